@@ -0,0 +1,598 @@
+"""
+Legal route catalog: domain -> routes -> procedures -> evidence/outcomes.
+
+Decisions read from one in-memory CatalogData, loaded from one or more
+backends:
+
+- static: the built-in LKA tables below (the original stub contract).
+- nyaya: the nyaya_data datasets of every country, via NyayaStore.
+- lka: a remote Legal Knowledge API, through the cached LKAClient.
+
+Backends are layered in the order given: a domain found in an earlier
+backend hides the same domain in later ones. Catalog.reload() loads
+every backend, builds the indexes and the pre-encoded route payloads,
+and publishes them with one reference swap; a reader that holds a
+CatalogData keeps a consistent view for as long as it needs one.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from nyaya_loader import get_store
+
+from app.lka_client import close_client, get_client
+from app.metrics import registry
+from app.payloads import RoutePayload, RoutePayloadTable
+from app.schema import legal_context_validator
+
+# Validation errors kept in Catalog.last_reload.
+MAX_REPORTED_ERRORS = 50
+
+CATALOG_RELOADS = registry.counter(
+    "law_agent_catalog_reloads_total",
+    "Catalog reloads by outcome (ok, failed)."
+)
+
+logger = logging.getLogger(__name__)
+
+# -------------------------
+# STATIC TABLES
+# -------------------------
+
+LKA_ROUTES = {
+    "IN_RENT_EVICTION": [
+        {
+            "route_id": "IN_EVICTION_NOTICE",
+            "domain_id": "IN_RENT_EVICTION",
+            "route_name": "Legal Eviction via Notice",
+            "procedure_ids": [
+                "IN_EVICT_NOTICE",
+                "IN_EVICT_FILE",
+                "IN_EVICT_HEARING"
+            ]
+        }
+    ]
+}
+
+LKA_PROCEDURES = {
+    "IN_EVICT_NOTICE": {
+        "procedure_id": "IN_EVICT_NOTICE",
+        "steps": [
+            {
+                "step": 1,
+                "action": "Serve legal notice",
+                "statute": "TPA Section 106",
+                "min_days": 15,
+                "max_days": 30
+            }
+        ],
+        "failure_paths": ["NO_RESPONSE", "INVALID_NOTICE"],
+        "appeal_available": True
+    },
+    "IN_EVICT_FILE": {
+        "procedure_id": "IN_EVICT_FILE",
+        "steps": [
+            {
+                "step": 1,
+                "action": "File eviction suit",
+                "statute": "Rent Control Act",
+                "min_days": 30,
+                "max_days": 90
+            }
+        ],
+        "failure_paths": ["CASE_DISMISSED"],
+        "appeal_available": True
+    },
+    "IN_EVICT_HEARING": {
+        "procedure_id": "IN_EVICT_HEARING",
+        "steps": [
+            {
+                "step": 1,
+                "action": "Court hearing",
+                "statute": "Civil Procedure Code",
+                "min_days": 60,
+                "max_days": 180
+            }
+        ],
+        "failure_paths": ["ADJOURNMENT"],
+        "appeal_available": True
+    }
+}
+
+LKA_EVIDENCE = {
+    pid: {
+        "procedure_id": pid,
+        "required_documents": [
+            "Rent Agreement",
+            "Ownership Proof",
+            "Previous Notices"
+        ],
+        "optional_documents": ["Witness affidavit"]
+    }
+    for pid in LKA_PROCEDURES
+}
+
+LKA_OUTCOMES = {
+    pid: {
+        "procedure_id": pid,
+        "success_range": [0.55, 0.75],
+        "escalation_risk": 0.2,
+        "wrong_route_penalty": 0.4
+    }
+    for pid in LKA_PROCEDURES
+}
+
+
+# -------------------------
+# DATA
+# -------------------------
+
+class CatalogSource(NamedTuple):
+    """
+    What one backend contributes. evidence is keyed by procedure_id, or by
+    route_id for route-level evidence; outcomes by procedure_id.
+    """
+    routes_by_domain: Dict[str, List[Dict[str, Any]]]
+    procedures: Dict[str, Dict[str, Any]]
+    evidence: Dict[str, Any]
+    outcomes: Dict[str, Any]
+    # domain_id -> country
+    countries: Dict[str, str]
+
+
+class CatalogData(NamedTuple):
+    version: int
+    loaded_at: float
+    routes_by_domain: Dict[str, List[Dict[str, Any]]]
+    routes: Dict[str, Dict[str, Any]]
+    procedures: Dict[str, Dict[str, Any]]
+    evidence: Dict[str, Any]
+    outcomes: Dict[str, Any]
+    countries: Dict[str, str]
+    # domain_id -> name of the backend that supplied it
+    sources: Dict[str, str]
+    payloads: RoutePayloadTable
+    # lowercased domain_id, as in state keys -> domain_id
+    domains_by_key: Dict[str, str]
+    # Ids that two domains define differently; see build_catalog.
+    conflicts: Tuple[str, ...] = ()
+
+    def routes_for(self, domain_id: str) -> Optional[List[Dict[str, Any]]]:
+        return self.routes_by_domain.get(domain_id)
+
+    def procedures_for(self, route_id: str) -> Optional[List[Dict[str, Any]]]:
+        route = self.routes.get(route_id)
+        if route is None:
+            return None
+        return [self.procedures[pid] for pid in route.get("procedure_ids", [])]
+
+    def route_ids_for_state(self, state_key: str) -> Tuple[str, ...]:
+        """
+        Route ids of a jurisdiction|domain|user_type state's domain.
+        """
+        parts = state_key.split("|")
+        domain_id = self.domains_by_key.get(parts[1]) if len(parts) == 3 else None
+        return self.payloads.route_ids(domain_id) if domain_id is not None else ()
+
+
+class CatalogError(Exception):
+    def __init__(self, message: str, errors: Sequence[str] = ()):
+        super().__init__(message if not errors else f"{message}: {len(errors)} error(s)")
+        self.errors = list(errors)
+
+
+def build_catalog(
+    layers: Sequence[Tuple[str, CatalogSource]],
+    version: int
+) -> CatalogData:
+    """
+    Merge (backend name, source) layers, earliest first, into a complete
+    CatalogData with its route payloads encoded.
+
+    Routes, procedures, evidence and outcomes share one namespace across
+    countries and backends. An id that two domains define differently
+    keeps its first definition and is listed in conflicts, which fails
+    validate_catalog, so one country is never served another's data.
+    """
+    routes_by_domain: Dict[str, List[Dict[str, Any]]] = {}
+    routes_by_id: Dict[str, Dict[str, Any]] = {}
+    procedures: Dict[str, Dict[str, Any]] = {}
+    evidence: Dict[str, Any] = {}
+    outcomes: Dict[str, Any] = {}
+    countries: Dict[str, str] = {}
+    sources: Dict[str, str] = {}
+    # (kind, id) -> "backend:domain_id" that first defined it
+    owners: Dict[Tuple[str, str], str] = {}
+    conflicts: List[str] = []
+
+    def claim(table: Dict[str, Any], kind: str, key: str, value: Any, owner: str):
+        if key not in table:
+            table[key] = value
+            owners[(kind, key)] = owner
+        elif table[key] != value:
+            conflicts.append(
+                f"{kind} {key}: {owner} differs from {owners[(kind, key)]}"
+            )
+
+    for name, source in layers:
+        for domain_id, routes in source.routes_by_domain.items():
+            if domain_id in routes_by_domain:
+                continue
+            routes_by_domain[domain_id] = list(routes)
+            sources[domain_id] = name
+            if domain_id in source.countries:
+                countries[domain_id] = source.countries[domain_id]
+
+            owner = f"{name}:{domain_id}"
+            for route in routes:
+                route_id = route["route_id"]
+                claim(routes_by_id, "route", route_id, route, owner)
+                if route_id in source.evidence:
+                    claim(evidence, "evidence", route_id, source.evidence[route_id], owner)
+                for pid in route.get("procedure_ids", []):
+                    claim(procedures, "procedure", pid, source.procedures[pid], owner)
+                    if pid in source.evidence:
+                        claim(evidence, "evidence", pid, source.evidence[pid], owner)
+                    if pid in source.outcomes:
+                        claim(outcomes, "outcome", pid, source.outcomes[pid], owner)
+
+    payloads = RoutePayloadTable()
+    payloads.rebuild(routes_by_domain, procedures, evidence, outcomes)
+    return CatalogData(
+        version,
+        time.time(),
+        routes_by_domain,
+        routes_by_id,
+        procedures,
+        evidence,
+        outcomes,
+        countries,
+        sources,
+        payloads,
+        {domain_id.lower(): domain_id for domain_id in routes_by_domain},
+        tuple(conflicts)
+    )
+
+
+EMPTY_CATALOG = build_catalog([], version=0)
+
+
+def validate_catalog(data: CatalogData) -> List[str]:
+    """
+    Check every procedure and evidence entry against the matching parts of
+    the legal context schema, and report ids defined differently by two
+    domains. Returns the errors found.
+    """
+    procedure_validator = legal_context_validator("procedure", item=True)
+    evidence_validator = legal_context_validator("evidence", item=True)
+
+    errors = list(data.conflicts)
+    for pid, procedure in data.procedures.items():
+        errors.extend(
+            f"procedure {pid}: {error}"
+            for error in procedure_validator.errors(procedure)
+        )
+    for key, evidence in data.evidence.items():
+        entries = evidence if isinstance(evidence, list) else [evidence]
+        for entry in entries:
+            errors.extend(
+                f"evidence {key}: {error}"
+                for error in evidence_validator.errors(entry)
+            )
+    return errors
+
+
+# -------------------------
+# BACKENDS
+# -------------------------
+
+class CatalogBackend:
+    name = "base"
+
+    async def load(self) -> CatalogSource:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class StaticCatalogBackend(CatalogBackend):
+    name = "static"
+
+    def __init__(
+        self,
+        routes_by_domain: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        procedures: Optional[Dict[str, Dict[str, Any]]] = None,
+        evidence: Optional[Dict[str, Any]] = None,
+        outcomes: Optional[Dict[str, Any]] = None,
+        country: str = "IN"
+    ):
+        if routes_by_domain is None:
+            routes_by_domain = LKA_ROUTES
+        self.source = CatalogSource(
+            routes_by_domain,
+            LKA_PROCEDURES if procedures is None else procedures,
+            LKA_EVIDENCE if evidence is None else evidence,
+            LKA_OUTCOMES if outcomes is None else outcomes,
+            {domain_id: country for domain_id in routes_by_domain}
+        )
+
+    async def load(self) -> CatalogSource:
+        return self.source
+
+
+class NyayaCatalogBackend(CatalogBackend):
+    """
+    Every country in nyaya_data. Routes that name a procedure missing from
+    their country's procedures.json are left out, like
+    get_legal_context leaves out incomplete contexts. A domain id present
+    in two countries is served from the first, alphabetically. Loading
+    fails while any dataset file does not parse, e.g. mid-rewrite.
+    """
+
+    name = "nyaya"
+
+    def __init__(self, store=None):
+        self.store = store
+
+    async def load(self) -> CatalogSource:
+        return await asyncio.to_thread(self._load)
+
+    def _load(self) -> CatalogSource:
+        store = self.store or get_store()
+        store.preload()
+        source = CatalogSource({}, {}, {}, {}, {})
+
+        for country in store.countries():
+            routes_file = store.get_file(country, "routes.json") or {}
+            procedures_file = store.get_file(country, "procedures.json") or {}
+            evidence_file = store.get_file(country, "evidence.json") or {}
+
+            for domain_id, routes in routes_file.items():
+                if domain_id in source.countries:
+                    logger.warning(
+                        "Nyaya domain %s is defined in %s and %s; using %s",
+                        domain_id, source.countries[domain_id], country,
+                        source.countries[domain_id]
+                    )
+                    continue
+
+                kept = []
+                for route in routes or []:
+                    route_id = route.get("route_id")
+                    pids = route.get("procedure_ids", [])
+                    missing = [pid for pid in pids if pid not in procedures_file]
+                    if not route_id or missing:
+                        logger.warning(
+                            "Skipping Nyaya route %s/%s: missing procedures %s",
+                            country, route_id, missing
+                        )
+                        continue
+                    kept.append(route)
+                    for key in (route_id, *pids):
+                        if key in evidence_file:
+                            source.evidence[key] = evidence_file[key]
+                    for pid in pids:
+                        source.procedures[pid] = procedures_file[pid]
+
+                if kept:
+                    source.routes_by_domain[domain_id] = kept
+                    source.countries[domain_id] = country
+
+        errors = store.load_errors()
+        if errors:
+            raise CatalogError(
+                "Nyaya datasets could not be loaded",
+                [f"{country}/{filename}: {error}" for (country, filename), error in sorted(errors.items())]
+            )
+        return source
+
+
+class LKACatalogBackend(CatalogBackend):
+    """
+    Every domain the remote LKA lists, fetched concurrently through the
+    shared LKAClient and its response cache.
+    """
+
+    name = "lka"
+
+    def __init__(self, client=None):
+        self.client = client
+
+    async def load(self) -> CatalogSource:
+        client = self.client or get_client()
+        domains = await client.list_domains()
+        domain_ids = [d["domain_id"] for d in domains]
+        route_lists = await asyncio.gather(
+            *(client.get_routes_for_domain(domain_id) for domain_id in domain_ids)
+        )
+
+        pids = list(dict.fromkeys(
+            pid
+            for routes in route_lists
+            for route in routes
+            for pid in route.get("procedure_ids", [])
+        ))
+        fetched = await asyncio.gather(
+            *(client.get_procedure(pid) for pid in pids),
+            *(client.get_evidence(pid) for pid in pids),
+            *(client.get_outcome_signal(pid) for pid in pids)
+        )
+        n = len(pids)
+        return CatalogSource(
+            dict(zip(domain_ids, route_lists)),
+            dict(zip(pids, fetched[:n])),
+            dict(zip(pids, fetched[n:2 * n])),
+            dict(zip(pids, fetched[2 * n:])),
+            {d["domain_id"]: d.get("country") for d in domains if d.get("country")}
+        )
+
+    async def close(self):
+        if self.client is None:
+            await close_client()
+
+
+CATALOG_BACKENDS = {
+    "static": StaticCatalogBackend,
+    "nyaya": NyayaCatalogBackend,
+    "lka": LKACatalogBackend,
+}
+
+
+def make_catalog_backends(spec: str) -> List[CatalogBackend]:
+    """
+    Backends from a comma-separated list of names, highest priority first.
+    """
+    backends = []
+    for name in (n.strip() for n in spec.split(",")):
+        if not name:
+            continue
+        try:
+            backends.append(CATALOG_BACKENDS[name]())
+        except KeyError:
+            raise ValueError(f"Unknown catalog backend: {name}") from None
+    return backends
+
+
+# -------------------------
+# CATALOG
+# -------------------------
+
+class Catalog:
+    """
+    The published CatalogData plus the backends it is loaded from.
+
+    reload() builds and validates a complete new CatalogData off the event
+    loop, then publishes it by swapping one reference. Requests that took
+    the previous data finish on it; a reload that fails leaves it in
+    place. Only one reload runs at a time.
+    """
+
+    def __init__(self, backends: Sequence[CatalogBackend]):
+        self.backends = list(backends)
+        self.data = EMPTY_CATALOG
+        self.last_reload: Dict[str, Any] = {}
+        self._reload_lock = asyncio.Lock()
+        self._reload_task: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def reloading(self) -> bool:
+        return self._reload_lock.locked()
+
+    async def reload(self) -> CatalogData:
+        """
+        Publish a freshly loaded catalog and return it. If it cannot be
+        loaded or fails validation, the error (CatalogError for validation)
+        is raised and the current data stays published.
+        """
+        async with self._reload_lock:
+            started = time.monotonic()
+            try:
+                sources = await asyncio.gather(*(backend.load() for backend in self.backends))
+                data = await asyncio.to_thread(
+                    build_catalog,
+                    [(backend.name, source) for backend, source in zip(self.backends, sources)],
+                    self.data.version + 1
+                )
+                errors = await asyncio.to_thread(validate_catalog, data)
+                if errors:
+                    raise CatalogError("Catalog failed validation", errors)
+            except Exception as exc:
+                self.last_reload = {
+                    "status": "failed",
+                    "finished_at": time.time(),
+                    "seconds": round(time.monotonic() - started, 3),
+                    "error": str(exc),
+                    "details": getattr(exc, "errors", [])[:MAX_REPORTED_ERRORS],
+                }
+                CATALOG_RELOADS.inc(status="failed")
+                raise
+
+            self.swap(data)
+            self.last_reload = {
+                "status": "ok",
+                "finished_at": time.time(),
+                "seconds": round(time.monotonic() - started, 3),
+                "version": data.version,
+            }
+            CATALOG_RELOADS.inc(status="ok")
+            return data
+
+    def reload_in_background(self) -> bool:
+        """
+        Start a reload unless one is already running. Returns whether one
+        was started; the outcome is reported in last_reload.
+        """
+        if self.reloading or (self._reload_task is not None and not self._reload_task.done()):
+            return False
+        self._reload_task = asyncio.create_task(self._reload_logged())
+        return True
+
+    async def _reload_logged(self):
+        try:
+            data = await self.reload()
+            logger.info("Catalog version %d published", data.version)
+        except Exception:
+            logger.exception("Catalog reload failed; keeping version %d", self.data.version)
+
+    def swap(self, data: CatalogData) -> CatalogData:
+        """
+        Publish data and return what it replaced.
+        """
+        previous, self.data = self.data, data
+        return previous
+
+    def describe(self) -> Dict[str, Any]:
+        data = self.data
+        return {
+            "version": data.version,
+            "loaded_at": data.loaded_at,
+            "domains": len(data.routes_by_domain),
+            "routes": len(data.routes),
+            "procedures": len(data.procedures),
+            "domains_by_backend": {
+                backend.name: sum(1 for name in data.sources.values() if name == backend.name)
+                for backend in self.backends
+            },
+            "reloading": self.reloading,
+            "last_reload": self.last_reload,
+        }
+
+    async def close(self):
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+        for backend in self.backends:
+            await backend.close()
+
+    # -------------------------
+    # LOOKUPS
+    # -------------------------
+    # Each reads the current data. A caller needing several consistent
+    # lookups takes catalog.data once and uses it instead.
+
+    def routes(self, domain_id: str) -> Optional[List[Dict[str, Any]]]:
+        return self.data.routes_for(domain_id)
+
+    def route_ids(self, domain_id: str) -> Tuple[str, ...]:
+        return self.data.payloads.route_ids(domain_id)
+
+    def payload(self, route_id: str) -> Optional[RoutePayload]:
+        return self.data.payloads.get(route_id)
+
+    def procedures(self, route_id: str) -> Optional[List[Dict[str, Any]]]:
+        return self.data.procedures_for(route_id)
+
+    def evidence(self, procedure_id: str) -> Optional[Any]:
+        return self.data.evidence.get(procedure_id)
+
+    def outcome(self, procedure_id: str) -> Optional[Any]:
+        return self.data.outcomes.get(procedure_id)
+
+    def domains(self) -> Dict[str, Optional[str]]:
+        """domain_id -> country."""
+        data = self.data
+        return {
+            domain_id: data.countries.get(domain_id)
+            for domain_id in data.routes_by_domain
+        }
@@ -0,0 +1,161 @@
+"""
+Bring an existing database up to the current models.
+
+Safe to run repeatedly: missing tables, columns and indexes are created,
+and reward rollup rows are rebuilt from their states if they are out of
+step with them; nothing else is changed or dropped. Usage: python -m app.db.migrations [DATABASE_URL]
+"""
+import sys
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+from sqlalchemy import and_, func, inspect, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+from app.db.session import Base, create_db_engine, engine as default_engine
+from app.memory.hierarchy import rollup_keys
+from app.memory.models import AgentMemory
+from app.memory.statistics import FIELDS, MAX_DECAY_HALF_LIVES
+
+
+def _add_missing_columns(conn, table):
+    existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    preparer = conn.dialect.identifier_preparer
+
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        ddl = (
+            f"ALTER TABLE {preparer.format_table(table)} "
+            f"ADD COLUMN {preparer.format_column(column)} "
+            f"{column.type.compile(dialect=conn.dialect)}"
+        )
+        if column.server_default is not None:
+            ddl += f" DEFAULT {column.server_default.arg}"
+        conn.exec_driver_sql(ddl)
+
+
+# -------------------------
+# ROLLUP BACKFILL
+# -------------------------
+
+def _decay(elapsed: float, half_life: float) -> float:
+    if half_life <= 0 or elapsed <= 0:
+        return 1.0
+    if elapsed >= half_life * MAX_DECAY_HALF_LIVES:
+        return 0.0
+    return 2.0 ** (-elapsed / half_life)
+
+
+def _rollup_row(state_key: str, action_key: str, rows: Sequence[Any]) -> Dict[str, Any]:
+    """
+    One rollup row aggregating the given state rows, with their decayed
+    sums brought to the latest updated_at and their windows aligned to
+    the latest bucket, as the reward upsert would have left it.
+    """
+    total = sum(r.total_reward or 0.0 for r in rows)
+    count = sum(r.times_used or 0 for r in rows)
+    updated_at = max(r.updated_at for r in rows)
+    bucket = max(r.window_bucket for r in rows)
+    current = [r for r in rows if r.window_bucket == bucket]
+    previous = [r for r in rows if r.window_bucket == bucket - 1]
+    return {
+        "state_key": state_key,
+        "action_key": action_key,
+        "total_reward": total,
+        "times_used": count,
+        "avg_reward": total / count if count else 0.0,
+        "updated_at": updated_at,
+        "half_life": max(r.half_life for r in rows),
+        "decayed_reward": sum(
+            r.decayed_reward * _decay(updated_at - r.updated_at, r.half_life) for r in rows
+        ),
+        "decayed_count": sum(
+            r.decayed_count * _decay(updated_at - r.updated_at, r.half_life) for r in rows
+        ),
+        "window_bucket": bucket,
+        "window_reward": sum(r.window_reward for r in current),
+        "window_count": sum(r.window_count for r in current),
+        "prev_window_reward": sum(r.prev_window_reward for r in current)
+        + sum(r.window_reward for r in previous),
+        "prev_window_count": sum(r.prev_window_count for r in current)
+        + sum(r.window_count for r in previous),
+    }
+
+
+def _backfill_rollups(conn):
+    """
+    Rebuild the rollup rows (app.memory.hierarchy) from the states they
+    aggregate if their vote counts disagree, as on a database written
+    before rollups existed. Every later write keeps them in step, so on
+    an up-to-date database this is two aggregate queries.
+    """
+    table = AgentMemory.__table__
+    key = table.c.state_key
+    three_parts = and_(key.like("%|%|%"), ~key.like("%|%|%|%"))
+    states = and_(three_parts, ~key.like("*|%"), ~key.like("%|*|%"), ~key.like("%|*"))
+    rollups = and_(three_parts, key.like("%|*"), ~key.like("%|*|*"))
+    domain_rollups = and_(rollups, key.like("*|%"))
+    jurisdiction_rollups = and_(rollups, ~key.like("*|%"))
+
+    def votes(where) -> int:
+        return conn.execute(
+            select(func.coalesce(func.sum(table.c.times_used), 0)).where(where)
+        ).scalar()
+
+    expected = votes(states)
+    if votes(domain_rollups) == expected and votes(jurisdiction_rollups) == expected:
+        return
+
+    if conn.dialect.name == "postgresql":
+        # Hold off concurrent reward upserts while the rollups are rebuilt.
+        conn.exec_driver_sql("LOCK TABLE agent_memory IN SHARE ROW EXCLUSIVE MODE")
+    conn.execute(table.delete().where(rollups))
+
+    groups: Dict[Tuple[str, str], List[Any]] = {}
+    columns = [table.c.state_key, table.c.action_key, *(table.c[name] for name in FIELDS)]
+    for row in conn.execute(select(*columns).where(states)):
+        for rollup in rollup_keys(row.state_key):
+            groups.setdefault((rollup, row.action_key), []).append(row)
+    if groups:
+        conn.execute(
+            table.insert(),
+            [_rollup_row(state_key, action_key, rows) for (state_key, action_key), rows in groups.items()]
+        )
+
+
+# Workers starting together on a fresh database race to create the same
+# tables; the losers retry against what the winner created.
+UPGRADE_ATTEMPTS = 3
+
+
+def upgrade(engine: Engine = default_engine):
+    for attempt in range(1, UPGRADE_ATTEMPTS + 1):
+        try:
+            _upgrade(engine)
+            return
+        except DBAPIError:
+            if attempt == UPGRADE_ATTEMPTS:
+                raise
+            time.sleep(0.1 * attempt)
+
+
+def _upgrade(engine: Engine):
+    with engine.begin() as conn:
+        existing_tables = set(inspect(conn).get_table_names())
+        Base.metadata.create_all(bind=conn)
+
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            _add_missing_columns(conn, table)
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+        if AgentMemory.__tablename__ in existing_tables:
+            _backfill_rollups(conn)
+
+
+if __name__ == "__main__":
+    upgrade(create_db_engine(sys.argv[1]) if len(sys.argv) > 1 else default_engine)
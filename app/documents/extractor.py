@@ -1,22 +1,194 @@
 import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
-def extract_legal_facts(text: str) -> dict:
-    facts = {}
+from app.metrics import timed
 
-    # Dates
-    dates = re.findall(r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}", text)
-    if dates:
-        facts["dates"] = dates[:5]
+# Default number of matches kept per fact type.
+FACT_LIMIT = 5
 
-    # Money amounts
-    amounts = re.findall(r"₹\s?\d+(?:,\d+)*(?:\.\d+)?", text)
-    if amounts:
-        facts["amounts"] = amounts[:5]
+DIGITS = "0123456789"
 
-    # Parties (very simple heuristic)
-    if "landlord" in text.lower():
-        facts["party_1"] = "landlord"
-    if "tenant" in text.lower():
-        facts["party_2"] = "tenant"
 
-    return facts
+class FactPattern(NamedTuple):
+    name: str
+    pattern: str
+    limit: int = FACT_LIMIT
+    ignore_case: bool = False
+    # When set, the fact is reported as this constant instead of a list of
+    # matched strings (e.g. party roles).
+    value: Optional[str] = None
+    # Every character a match can start with, listed literally (e.g.
+    # DIGITS). Derived for ignore_case literals. Without it the pattern
+    # still works, but the scanner has to try every offset of the text.
+    first_chars: Optional[str] = None
+
+
+# domain_id -> fact name -> pattern. The None entry applies to every domain.
+_REGISTRY: Dict[Optional[str], Dict[str, FactPattern]] = {None: {}}
+_registry_lock = threading.Lock()
+
+
+def register_fact_pattern(
+    name: str,
+    pattern: str,
+    limit: int = FACT_LIMIT,
+    ignore_case: bool = False,
+    value: Optional[str] = None,
+    domain_id: Optional[str] = None,
+    first_chars: Optional[str] = None
+):
+    """
+    Add or replace a fact type. Domain-specific patterns are scanned in
+    addition to the global ones when extract_legal_facts is given that
+    domain_id.
+    """
+    fact = FactPattern(
+        name, pattern, 1 if value is not None else limit, ignore_case, value, first_chars
+    )
+    _compile((fact,))
+    with _registry_lock:
+        _REGISTRY.setdefault(domain_id, {})[name] = fact
+
+
+def _patterns_for(domain_id: Optional[str]) -> Tuple[FactPattern, ...]:
+    patterns = dict(_REGISTRY[None])
+    if domain_id is not None:
+        patterns.update(_REGISTRY.get(domain_id, {}))
+    return tuple(patterns.values())
+
+
+def _alternatives(fact: FactPattern, group: str) -> List[Tuple[str, str]]:
+    """
+    The branches matching fact, as (group name, branch). Each branch ends
+    in that empty named group so the match can be attributed to it.
+
+    Branches start with one literal character wherever possible, which
+    lets the engine skip straight to offsets holding one of them. A
+    literal pattern is split after that character; any other pattern is
+    checked by a lookahead from the character's position, so the branch
+    itself only consumes the character and the group marks where the
+    fact ends.
+    """
+    pattern = fact.pattern
+    if fact.ignore_case and re.escape(pattern) == pattern:
+        rest = f"(?i:{pattern[1:]})" if pattern[1:] else ""
+        cases = (c for c in (pattern[0].lower(), pattern[0].upper()) if len(c) == 1)
+        return [
+            (f"{group}_{i}", f"{re.escape(c)}{rest}(?P<{group}_{i}>)")
+            for i, c in enumerate(dict.fromkeys(cases))
+        ]
+
+    body = f"(?i:{pattern})" if fact.ignore_case else pattern
+    if not fact.first_chars:
+        return [(group, f"(?:{body})(?P<{group}>)")]
+    return [
+        (f"{group}_{i}", f"{re.escape(c)}(?<=(?=(?:{body})(?P<{group}_{i}>)).)")
+        for i, c in enumerate(dict.fromkeys(fact.first_chars))
+    ]
+
+
+@lru_cache(maxsize=256)
+def _compile(facts: Tuple[FactPattern, ...]) -> Tuple["re.Pattern[str]", Dict[str, int]]:
+    """
+    One alternation over facts, and the index of the fact each of its
+    groups belongs to. Group names must be identifiers, so facts are
+    addressed by position rather than by name.
+    """
+    branches = []
+    owners = {}
+    for index, fact in enumerate(facts):
+        # The prefix keeps them apart from groups named in the patterns.
+        for group, branch in _alternatives(fact, f"_fact{index}"):
+            branches.append(branch)
+            owners[group] = index
+    return re.compile("|".join(branches)), owners
+
+
+# -------------------------
+# SCANNER
+# -------------------------
+
+class FactCollector:
+    """
+    Accumulates facts over one or more text chunks in a single pass.
+
+    All active fact types are combined into one alternation and scanned
+    with finditer; like any alternation, it reports one fact per stretch
+    of text. When a type reaches its limit, scanning continues with a
+    scanner compiled without it; once every type is full, feed() returns
+    True and later chunks are ignored.
+    """
+
+    def __init__(self, domain_id: Optional[str] = None):
+        self._patterns = _patterns_for(domain_id)
+        self._remaining = {fact: fact.limit for fact in self._patterns}
+        self._found: Dict[str, List[str]] = {}
+
+    @property
+    def saturated(self) -> bool:
+        return not self._remaining
+
+    @timed("extract_legal_facts")
+    def feed(self, text: str) -> bool:
+        pos = 0
+        while self._remaining:
+            active = tuple(self._remaining)
+            scanner, owners = _compile(active)
+            full = None
+            for match in scanner.finditer(text, pos):
+                # Branches checked by lookahead consume one character, so
+                # later offsets inside the fact just found match again.
+                if match.start() < pos:
+                    continue
+                fact = active[owners[match.lastgroup]]
+                pos = match.end(match.lastgroup)
+                self._found.setdefault(fact.name, []).append(text[match.start():pos])
+                self._remaining[fact] -= 1
+                if not self._remaining[fact]:
+                    full = fact
+                    break
+            if full is None:
+                break
+            del self._remaining[full]
+        return self.saturated
+
+    def facts(self) -> Dict[str, Any]:
+        facts: Dict[str, Any] = {}
+        for fact in self._patterns:
+            matches = self._found.get(fact.name)
+            if matches:
+                facts[fact.name] = fact.value if fact.value is not None else matches
+        return facts
+
+
+def extract_legal_facts(text: str, domain_id: Optional[str] = None) -> dict:
+    collector = FactCollector(domain_id)
+    collector.feed(text)
+    return collector.facts()
+
+
+# -------------------------
+# BUILT-IN FACT TYPES
+# -------------------------
+
+# Dates
+register_fact_pattern("dates", r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}", first_chars=DIGITS)
+
+# Money amounts
+register_fact_pattern("amounts", r"₹\s?\d+(?:,\d+)*(?:\.\d+)?", first_chars="₹")
+
+# Parties (very simple heuristic)
+register_fact_pattern("party_1", "landlord", ignore_case=True, value="landlord")
+register_fact_pattern("party_2", "tenant", ignore_case=True, value="tenant")
+
+# Statute citations, e.g. "Section 106", "sec. 21A" or "s.9". The words
+# match in any case, the sub-section letter only in upper case. "s." must
+# start a word and the number must not run on into a date, so
+# "s.12/05/2021" is a date rather than a citation.
+register_fact_pattern(
+    "sections",
+    r"(?:(?<!\w)(?i:section|sec\.)|(?<![\w.])[Ss]\.)\s?\d+[A-Z]?\b(?![/.-]\d)",
+    first_chars="Ss"
+)
@@ -0,0 +1,233 @@
+"""
+Background processing of uploaded documents.
+
+Uploads are spooled to disk and queued; a fixed set of worker threads
+extracts text and facts from them, so a large filing no longer holds a
+request open for the whole parse. Everything is in process memory:
+jobs and results do not survive a restart and are visible only to the
+worker that accepted them.
+
+- backpressure: at most max_queued jobs wait; submit() raises
+  JobQueueFull past that, which the API reports as 429.
+- timeouts: a job fails with status "timeout" once it has run for
+  timeout seconds (checked between page ranges).
+- retention: finished jobs are dropped result_ttl seconds after they
+  finish.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.documents.extractor import FactCollector
+from app.documents.parser import ExtractionTimeout, extract_text_from_path
+from app.metrics import registry
+
+DOCUMENT_JOBS = registry.counter(
+    "law_agent_document_jobs_total",
+    "Background document jobs by outcome (done, failed, timeout, cancelled, rejected)."
+)
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+TIMEOUT = "timeout"
+CANCELLED = "cancelled"
+
+FINISHED = (DONE, FAILED, TIMEOUT, CANCELLED)
+
+PREVIEW_CHARS = 1000
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class DocumentJob:
+    def __init__(self, path: str, domain_id: Optional[str]):
+        self.job_id = uuid.uuid4().hex
+        self.path = path
+        self.domain_id = domain_id
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "domain_id": self.domain_id,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class DocumentJobQueue:
+    """
+    Bounded queue of document jobs served by a pool of worker threads.
+    Page extraction itself still fans out to the parser's process pool
+    for long documents.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queued: int = 16,
+        timeout: float = 300.0,
+        result_ttl: float = 900.0,
+        max_pages: Optional[int] = None
+    ):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.result_ttl = result_ttl
+        self.max_pages = max_pages
+
+        self._queue: "queue.Queue[Optional[DocumentJob]]" = queue.Queue(maxsize=max_queued)
+        self._jobs: Dict[str, DocumentJob] = {}
+        # (monotonic finish time, job_id), oldest first.
+        self._finished: Deque[Tuple[float, str]] = deque()
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._threads: List[threading.Thread] = []
+
+    # -------------------------
+    # CLIENT SIDE
+    # -------------------------
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    def has_capacity(self) -> bool:
+        """
+        Cheap pre-check so callers can refuse an upload before spooling
+        it. submit() still enforces the limit.
+        """
+        return not self._stopping and not self._queue.full()
+
+    def submit(self, path: str, domain_id: Optional[str] = None) -> DocumentJob:
+        """
+        Queue the PDF at path, which the job owns and removes once
+        processed. Raises JobQueueFull when max_queued jobs are waiting;
+        the caller then still owns the file.
+        """
+        if self._stopping:
+            raise JobQueueFull("Document queue is shutting down")
+        job = DocumentJob(path, domain_id)
+        with self._lock:
+            self._evict_expired()
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                DOCUMENT_JOBS.inc(status="rejected")
+                raise JobQueueFull(f"{self.max_queued} documents already queued") from None
+            self._jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[DocumentJob]:
+        with self._lock:
+            self._evict_expired()
+            return self._jobs.get(job_id)
+
+    def _evict_expired(self):
+        cutoff = time.monotonic() - self.result_ttl
+        while self._finished and self._finished[0][0] <= cutoff:
+            _, job_id = self._finished.popleft()
+            self._jobs.pop(job_id, None)
+
+    # -------------------------
+    # WORKERS
+    # -------------------------
+
+    def _finish(
+        self,
+        job: DocumentJob,
+        status: str,
+        error: Optional[str] = None,
+        result: Optional[Dict[str, Any]] = None
+    ):
+        # Status is set last, so a poller that sees a finished status also
+        # sees its result and error.
+        with self._lock:
+            job.result = result
+            job.error = error
+            job.finished_at = time.time()
+            job.status = status
+            self._finished.append((time.monotonic(), job.job_id))
+        DOCUMENT_JOBS.inc(status=status)
+
+    def _process(self, job: DocumentJob):
+        with self._lock:
+            job.started_at = time.time()
+            job.status = RUNNING
+        collector = FactCollector(job.domain_id)
+        try:
+            text = extract_text_from_path(
+                job.path,
+                max_pages=self.max_pages,
+                stop_when=collector.feed,
+                deadline=time.monotonic() + self.timeout if self.timeout else None
+            )
+            self._finish(job, DONE, result={
+                "facts": collector.facts(),
+                "preview": text[:PREVIEW_CHARS]
+            })
+        except ExtractionTimeout:
+            self._finish(job, TIMEOUT, f"Processing exceeded {self.timeout:g}s")
+        except Exception as exc:
+            logger.exception("Document job %s failed", job.job_id)
+            self._finish(job, FAILED, str(exc) or type(exc).__name__)
+        finally:
+            os.unlink(job.path)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._process(job)
+
+    def start(self):
+        with self._lock:
+            if self._threads or self._stopping:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._run,
+                    name=f"document-job-{i}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        """
+        Cancel waiting jobs and wait for running ones, which end at their
+        timeout at the latest.
+        """
+        self._stopping = True
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                os.unlink(job.path)
+                self._finish(job, CANCELLED, "Server shutting down")
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
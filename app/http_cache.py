@@ -0,0 +1,176 @@
+"""
+Response cache for read-only JSON endpoints.
+
+Bodies are encoded once per (key, dataset version) and kept in memory
+together with a gzip copy and a strong ETag. A request whose
+If-None-Match matches gets a bodiless 304, so a revalidating client
+costs one dictionary lookup.
+
+The ETag is a digest of the encoded body, so it is the same in every
+worker and changes exactly when the content does. The version passed
+by the caller only decides when a cached body must be rebuilt.
+"""
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+from fastapi import Request, Response
+
+from app.metrics import registry
+from app.payloads import encode_json
+
+# Seconds clients and proxies may reuse a response before revalidating.
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "300"))
+# Cached responses kept per cache.
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "4096"))
+# Smaller bodies are sent uncompressed; gzip would barely shrink them.
+HTTP_CACHE_GZIP_MIN_BYTES = int(os.getenv("HTTP_CACHE_GZIP_MIN_BYTES", "1024"))
+
+HTTP_CACHE_RESPONSES = registry.counter(
+    "law_agent_http_cache_responses_total",
+    "Cached endpoint responses by outcome: not_modified for a 304, else "
+    "hit when a stored body was served and miss when it was just built."
+)
+
+
+class CachedResponse(NamedTuple):
+    etag: str
+    body: bytes
+    gzipped: Optional[bytes]
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _if_none_match(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        # If-None-Match uses the weak comparison.
+        if tag == "*" or tag == etag or tag == "W/" + etag:
+            return True
+    return False
+
+
+def _accepts_gzip(request: Request) -> bool:
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() != "gzip":
+            continue
+        quality = params.replace(" ", "").lower()
+        if not quality.startswith("q="):
+            return True
+        try:
+            return float(quality[2:]) > 0
+        except ValueError:
+            return False
+    return False
+
+
+class ResponseCache:
+    """
+    Bounded LRU map of key -> (version, CachedResponse).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = HTTP_CACHE_MAX_ENTRIES,
+        max_age: int = HTTP_CACHE_MAX_AGE,
+        gzip_min_bytes: int = HTTP_CACHE_GZIP_MIN_BYTES
+    ):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.gzip_min_bytes = gzip_min_bytes
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: Hashable, version: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None or cached[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return cached[1]
+
+    def _put(self, key: Hashable, version: Hashable, entry: CachedResponse):
+        with self._lock:
+            self._entries[key] = (version, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _build(self, key: Hashable, version: Hashable, build: Callable[[], Any]) -> Optional[CachedResponse]:
+        value = build()
+        if value is None:
+            return None
+        body = encode_json(value)
+        gzipped = (
+            gzip.compress(body, compresslevel=6, mtime=0)
+            if len(body) >= self.gzip_min_bytes else None
+        )
+        entry = CachedResponse(_etag(body), body, gzipped)
+        self._put(key, version, entry)
+        return entry
+
+    def entry(
+        self,
+        key: Hashable,
+        version: Hashable,
+        build: Callable[[], Any]
+    ) -> Optional[CachedResponse]:
+        """
+        The cached response for key at version, encoding build() on a
+        miss. A None result is not cached; the caller answers 404.
+        """
+        entry = self._get(key, version)
+        if entry is not None:
+            return entry
+        return self._build(key, version, build)
+
+    def response(
+        self,
+        request: Request,
+        key: Hashable,
+        version: Hashable,
+        build: Callable[[], Any]
+    ) -> Optional[Response]:
+        """
+        entry() answered with respond(), counting the outcome once. None
+        when build() returns None.
+        """
+        entry = self._get(key, version)
+        hit = entry is not None
+        if not hit:
+            entry = self._build(key, version, build)
+            if entry is None:
+                return None
+        response = self.respond(request, entry)
+        if response.status_code == 304:
+            HTTP_CACHE_RESPONSES.inc(result="not_modified")
+        else:
+            HTTP_CACHE_RESPONSES.inc(result="hit" if hit else "miss")
+        return response
+
+    def respond(self, request: Request, entry: CachedResponse) -> Response:
+        headers = {
+            "ETag": entry.etag,
+            "Cache-Control": f"public, max-age={self.max_age}",
+            "Vary": "Accept-Encoding",
+        }
+        if _if_none_match(request, entry.etag):
+            return Response(status_code=304, headers=headers)
+
+        if entry.gzipped is not None and _accepts_gzip(request):
+            headers["Content-Encoding"] = "gzip"
+            return Response(entry.gzipped, media_type="application/json", headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
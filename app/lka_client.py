@@ -1,26 +1,198 @@
-import requests
-
-LKA_BASE_URL = "http://nyaya-core/lka"
-
-def get_domain(domain_id: str):
-    res = requests.get(f"{LKA_BASE_URL}/domains/{domain_id}")
-    res.raise_for_status()
-    return res.json()
-
-def get_routes_for_domain(domain_id: str):
-    res = requests.get(
-        f"{LKA_BASE_URL}/routes",
-        params={"domain": domain_id}
-    )
-    res.raise_for_status()
-    return res.json()
-
-def get_procedure(procedure_id: str):
-    res = requests.get(f"{LKA_BASE_URL}/procedure/{procedure_id}")
-    res.raise_for_status()
-    return res.json()
-
-def get_outcome_signal(procedure_id: str):
-    res = requests.get(f"{LKA_BASE_URL}/outcomes/{procedure_id}")
-    res.raise_for_status()
-    return res.json()
+import asyncio
+import os
+import time
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import httpx
+
+LKA_BASE_URL = os.getenv("LKA_BASE_URL", "http://nyaya-core/lka")
+
+LKA_TIMEOUT = float(os.getenv("LKA_TIMEOUT", "5.0"))
+LKA_CONNECT_TIMEOUT = float(os.getenv("LKA_CONNECT_TIMEOUT", "2.0"))
+LKA_MAX_CONNECTIONS = int(os.getenv("LKA_MAX_CONNECTIONS", "100"))
+LKA_CACHE_TTL = float(os.getenv("LKA_CACHE_TTL", "300"))
+
+
+# -------------------------
+# TTL CACHE
+# -------------------------
+
+class TTLCache:
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+        return True, value
+
+    def set(self, key: Hashable, value: Any):
+        if len(self._entries) >= self.max_entries:
+            self._evict_expired()
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for key in [k for k, (exp, _) in self._entries.items() if exp < now]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+
+# -------------------------
+# ASYNC CLIENT
+# -------------------------
+
+class LKAClient:
+    """
+    Async client for the Nyaya Legal Knowledge API.
+
+    All calls share one pooled httpx.AsyncClient. Successful payloads are
+    cached for cache_ttl seconds, and concurrent requests for the same
+    resource are coalesced into a single upstream call.
+    """
+
+    def __init__(
+        self,
+        base_url: str = LKA_BASE_URL,
+        timeout: float = LKA_TIMEOUT,
+        connect_timeout: float = LKA_CONNECT_TIMEOUT,
+        max_connections: int = LKA_MAX_CONNECTIONS,
+        cache_ttl: float = LKA_CACHE_TTL,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self._http = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            transport=transport
+        )
+        self.cache = TTLCache(cache_ttl)
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    async def aclose(self):
+        for task in self._inflight.values():
+            task.cancel()
+        self._inflight.clear()
+        await self._http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def _fetch(self, key: Hashable, path: str, params: Optional[Dict[str, str]]) -> Any:
+        try:
+            res = await self._http.get(path, params=params)
+            res.raise_for_status()
+            value = res.json()
+            self.cache.set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _get(self, path: str, params: Optional[Dict[str, str]] = None) -> Any:
+        key = (path, tuple(sorted((params or {}).items())))
+
+        hit, value = self.cache.get(key)
+        if hit:
+            return value
+
+        # The upstream call runs as its own task that every caller awaits
+        # through a shield, so a cancelled caller, including the one that
+        # started it, leaves the call running for the others.
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, path, params))
+            # Retrieve the outcome so a failure nobody waits for any more
+            # is not reported as never retrieved.
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    # -------------------------
+    # LKA RESOURCES
+    # -------------------------
+
+    async def list_domains(self) -> List[Dict[str, Any]]:
+        return await self._get("/domains")
+
+    async def get_domain(self, domain_id: str) -> Dict[str, Any]:
+        return await self._get(f"/domains/{domain_id}")
+
+    async def get_routes_for_domain(self, domain_id: str) -> List[Dict[str, Any]]:
+        return await self._get("/routes", params={"domain": domain_id})
+
+    async def get_procedure(self, procedure_id: str) -> Dict[str, Any]:
+        return await self._get(f"/procedure/{procedure_id}")
+
+    async def get_evidence(self, procedure_id: str) -> Dict[str, Any]:
+        return await self._get(f"/evidence/{procedure_id}")
+
+    async def get_outcome_signal(self, procedure_id: str) -> Dict[str, Any]:
+        return await self._get(f"/outcomes/{procedure_id}")
+
+    async def fetch_route_bundle(self, route: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch every procedure and outcome signal of a route concurrently.
+        """
+        procedure_ids = route.get("procedure_ids", [])
+        results = await asyncio.gather(
+            *(self.get_procedure(pid) for pid in procedure_ids),
+            *(self.get_outcome_signal(pid) for pid in procedure_ids)
+        )
+        return {
+            "procedures": list(results[:len(procedure_ids)]),
+            "outcomes": list(results[len(procedure_ids):]),
+        }
+
+
+# -------------------------
+# SHARED DEFAULT CLIENT
+# -------------------------
+
+_client: Optional[LKAClient] = None
+
+
+def get_client() -> LKAClient:
+    global _client
+    if _client is None:
+        _client = LKAClient()
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def get_domain(domain_id: str):
+    return await get_client().get_domain(domain_id)
+
+
+async def get_routes_for_domain(domain_id: str):
+    return await get_client().get_routes_for_domain(domain_id)
+
+
+async def get_procedure(procedure_id: str):
+    return await get_client().get_procedure(procedure_id)
+
+
+async def get_outcome_signal(procedure_id: str):
+    return await get_client().get_outcome_signal(procedure_id)
@@ -1,45 +1,273 @@
-from fastapi import FastAPI, Depends, UploadFile, File, HTTPException
+from fastapi import Body, FastAPI, Depends, UploadFile, File, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, String, Float, Integer
-from sqlalchemy.orm import sessionmaker, declarative_base, Session
-from pydantic import BaseModel
-from typing import List, Optional
-import fitz  # PyMuPDF
-import re
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, Field, ValidationError, ValidationInfo, field_validator
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+import hmac
+import json
+import os
+import time
+
+from legal_context_api import (
+    context_version,
+    get_domain_contexts,
+    get_legal_context,
+    warm_legal_contexts,
+)
+from nyaya_loader import get_store
+
+from app.catalog import Catalog, make_catalog_backends
+from app.db.async_session import async_engine, get_async_db
+from app.db.migrations import upgrade
+from app.db.session import SessionLocal, engine
+from app.documents.extractor import FactCollector, extract_legal_facts
+from app.documents.jobs import DocumentJobQueue, JobQueueFull
+from app.documents.parser import (
+    extract_text_from_path,
+    shutdown_pool,
+    spool_to_tempfile,
+)
+from app.http_cache import ResponseCache
+from app.memory.aggregator import RewardAggregator, new_batch_id
+from app.memory.backends import make_memory_backend
+from app.memory.contextual import ContextualRouter, decode_context, encode_context
+from app.memory.event_log import FeedbackEventLog
+from app.memory.hierarchy import ANY, backoff, is_rollup, rollup_keys, with_rollups
+from app.memory.models import AgentMemory
+from app.memory.policies import PolicySelector, RouteStats
+from app.memory.score_cache import RouteScoreCache
+from app.memory.statistics import FIELDS, RewardStatistics
+from app.metrics import METRICS_ENABLED, MetricsMiddleware, registry, span, timed
+from app.payloads import encode_json, render_decision
+from app.schema import dataset_errors
 
 # =====================================================
 # CONFIG
 # =====================================================
-DATABASE_URL = "sqlite:///./law_agent.db"
+# Storage settings (DATABASE_URL, SQLite pragmas, pool sizes) live in
+# app.db.session and are read from the environment, as do the ranking,
+# decay and window settings in app.memory.statistics.
+
+# Feedback is buffered in memory and written in batches. A vote reaches
+# the database at most FEEDBACK_MAX_STALENESS seconds after it arrives,
+# or sooner once FEEDBACK_MAX_PENDING distinct keys are waiting.
+FEEDBACK_MAX_STALENESS = float(os.getenv("FEEDBACK_MAX_STALENESS", "1.0"))
+FEEDBACK_MAX_PENDING = int(os.getenv("FEEDBACK_MAX_PENDING", "500"))
+# A batch that fails to write is retried with backoff; after
+# FEEDBACK_MAX_ATTEMPTS failures it is logged and dropped.
+FEEDBACK_MAX_ATTEMPTS = int(os.getenv("FEEDBACK_MAX_ATTEMPTS", "5"))
+
+# Raw feedback events are also appended to a segmented log under
+# FEEDBACK_LOG_DIR ("" disables it), so scores can be rebuilt with a
+# different reward function: python -m app.memory.replay.
+FEEDBACK_LOG_DIR = os.getenv("FEEDBACK_LOG_DIR", "./feedback_log")
+FEEDBACK_LOG_SEGMENT_BYTES = int(os.getenv("FEEDBACK_LOG_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+
+# Route catalog backends, highest priority first: "static" (built-in LKA
+# tables), "nyaya" (nyaya_data, every country) and "lka" (remote LKA at
+# LKA_BASE_URL). A domain in an earlier backend hides it in later ones.
+# The catalog is loaded into memory at startup and reloaded, without
+# interrupting traffic, by POST /api/v1/admin/catalog/reload.
+CATALOG_BACKENDS = os.getenv("CATALOG_BACKENDS", "nyaya,static")
+
+# When set, /api/v1/admin/* requires this value in the X-Admin-Token header.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Upload parsing stops after PDF_MAX_PAGES pages (0 = no limit), or as
+# soon as every fact type has reached its match limit.
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "0"))
+
+# Background uploads (/api/v1/upload/jobs) are parsed by
+# DOCUMENT_JOB_WORKERS threads. Past DOCUMENT_JOB_QUEUE_LIMIT waiting
+# jobs new ones are refused with 429. A job fails after running
+# DOCUMENT_JOB_TIMEOUT seconds (0 = no limit), and finished jobs are
+# forgotten DOCUMENT_JOB_RESULT_TTL seconds later.
+DOCUMENT_JOB_WORKERS = int(os.getenv("DOCUMENT_JOB_WORKERS", "2"))
+DOCUMENT_JOB_QUEUE_LIMIT = int(os.getenv("DOCUMENT_JOB_QUEUE_LIMIT", "16"))
+DOCUMENT_JOB_TIMEOUT = float(os.getenv("DOCUMENT_JOB_TIMEOUT", "300"))
+DOCUMENT_JOB_RESULT_TTL = float(os.getenv("DOCUMENT_JOB_RESULT_TTL", "900"))
+
+# Number of state_keys whose route scores are kept in process memory.
+SCORE_CACHE_SIZE = int(os.getenv("SCORE_CACHE_SIZE", "1024"))
+
+# RL memory backend: "local" when this process is the only writer, or
+# "shared" when several workers/nodes use the same DATABASE_URL. In
+# shared mode each worker checks the shared memory version at most every
+# MEMORY_SYNC_INTERVAL seconds and drops its cached scores when it moved;
+# this bounds how stale another worker's view can be.
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "local")
+MEMORY_SYNC_INTERVAL = float(os.getenv("MEMORY_SYNC_INTERVAL", "1.0"))
+
+# Route selection policy: greedy, epsilon_greedy, ucb1 or thompson.
+# ROUTE_POLICY_BY_DOMAIN is a JSON object of domain_id -> policy name.
+# Setting ROUTE_POLICY_SEED makes exploration deterministic.
+ROUTE_POLICY = os.getenv("ROUTE_POLICY", "greedy")
+ROUTE_POLICY_BY_DOMAIN = json.loads(os.getenv("ROUTE_POLICY_BY_DOMAIN", "{}"))
+ROUTE_POLICY_SEED = os.getenv("ROUTE_POLICY_SEED")
+
+# Case-aware routing. With CONTEXTUAL_ROUTING on, decisions hash the case
+# summary and its facts into CONTEXTUAL_FEATURES buckets and return a
+# context_id; feedback quoting it trains a LinUCB model per state, with
+# exploration weight CONTEXTUAL_ALPHA. A state is ranked by its reward
+# statistics until it has received such feedback.
+CONTEXTUAL_ROUTING = os.getenv("CONTEXTUAL_ROUTING", "0").lower() in ("1", "true", "yes")
+CONTEXTUAL_FEATURES = int(os.getenv("CONTEXTUAL_FEATURES", "64"))
+CONTEXTUAL_ALPHA = float(os.getenv("CONTEXTUAL_ALPHA", "1.0"))
+
+# Most decisions one /api/v1/decision/batch request may ask for; larger
+# batches are refused with 413.
+DECISION_BATCH_MAX_ITEMS = int(os.getenv("DECISION_BATCH_MAX_ITEMS", "100"))
+
+# Upper bound on state_keys per IN (...) query, below SQLite's variable limit.
+SCORE_QUERY_CHUNK = 500
 
 # =====================================================
 # DATABASE SETUP
 # =====================================================
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
+# Creates agent_memory on a fresh database and adds indexes/columns
+# missing from older law_agent.db files.
+upgrade(engine)
+
+reward_statistics = RewardStatistics()
+
+# Dataset entries are checked against the legal context schema as they
+# load; lookups are timed only while metrics are on.
+get_store().configure(validator=dataset_errors, timer=span if METRICS_ENABLED else None)
+
+catalog = Catalog(make_catalog_backends(CATALOG_BACKENDS))
+
+memory_backend = make_memory_backend(MEMORY_BACKEND, statistics=reward_statistics)
+
+score_cache = RouteScoreCache(
+    max_states=SCORE_CACHE_SIZE,
+    sync_interval=MEMORY_SYNC_INTERVAL
+)
+
+contextual_router = (
+    ContextualRouter(
+        dim=CONTEXTUAL_FEATURES,
+        alpha=CONTEXTUAL_ALPHA,
+        max_states=SCORE_CACHE_SIZE
+    )
+    if CONTEXTUAL_ROUTING else None
+)
+
+route_policies = PolicySelector(
+    default=ROUTE_POLICY,
+    by_domain=ROUTE_POLICY_BY_DOMAIN,
+    seed=int(ROUTE_POLICY_SEED) if ROUTE_POLICY_SEED else None
+)
+
+reward_aggregator = RewardAggregator(
+    SessionLocal,
+    memory_backend,
+    max_staleness=FEEDBACK_MAX_STALENESS,
+    max_pending=FEEDBACK_MAX_PENDING,
+    on_flush=lambda keys: score_cache.invalidate(with_rollups(s for s, _ in keys)),
+    max_attempts=FEEDBACK_MAX_ATTEMPTS
+)
+
+feedback_log = (
+    FeedbackEventLog(FEEDBACK_LOG_DIR, segment_bytes=FEEDBACK_LOG_SEGMENT_BYTES)
+    if FEEDBACK_LOG_DIR else None
+)
+
+document_jobs = DocumentJobQueue(
+    workers=DOCUMENT_JOB_WORKERS,
+    max_queued=DOCUMENT_JOB_QUEUE_LIMIT,
+    timeout=DOCUMENT_JOB_TIMEOUT,
+    result_ttl=DOCUMENT_JOB_RESULT_TTL,
+    max_pages=PDF_MAX_PAGES or None
+)
+
+# Encoded legal-context responses, rebuilt when the country's dataset
+# version moves (HTTP_CACHE_* settings in app.http_cache).
+legal_context_responses = ResponseCache()
+
+# =====================================================
+# METRICS
+# =====================================================
+UPLOAD_BYTES = registry.counter(
+    "law_agent_upload_bytes_total",
+    "Bytes received by /api/v1/upload."
+)
+
+registry.gauge(
+    "law_agent_score_cache_requests_total",
+    "Route score cache lookups by result.",
+    lambda: [
+        ({"result": "hit"}, score_cache.hits),
+        ({"result": "miss"}, score_cache.misses),
+    ],
+    kind="counter"
+)
+registry.gauge(
+    "law_agent_score_cache_syncs_total",
+    "Score cache clears caused by writes from other workers.",
+    lambda: score_cache.syncs,
+    kind="counter"
+)
+registry.gauge(
+    "law_agent_score_cache_states",
+    "State keys currently held in the route score cache.",
+    lambda: score_cache.stats()["size"]
+)
+registry.gauge(
+    "law_agent_feedback_pending_keys",
+    "Feedback keys waiting for the next flush.",
+    reward_aggregator.pending
+)
+registry.gauge(
+    "law_agent_document_jobs_queued",
+    "Background document jobs waiting for a worker.",
+    lambda: document_jobs.queued
 )
-SessionLocal = sessionmaker(bind=engine, autoflush=False)
-Base = declarative_base()
 
 # =====================================================
-# AGENT MEMORY (RL TABLE)
+# LIFECYCLE
 # =====================================================
-class AgentMemory(Base):
-    __tablename__ = "agent_memory"
+async def load_datasets():
+    # Parse every Nyaya file before the first request rather than on it.
+    await run_in_threadpool(get_store().preload)
+
 
-    state_key = Column(String, primary_key=True)
-    action_key = Column(String, primary_key=True)
-    total_reward = Column(Float, default=0.0)
-    times_used = Column(Integer, default=0)
-    avg_reward = Column(Float, default=0.0)
+async def load_catalog():
+    # Fails startup rather than serving without a valid catalog.
+    await catalog.reload()
 
-Base.metadata.create_all(bind=engine)
+
+def start_feedback_pipeline():
+    reward_aggregator.start()
+    document_jobs.start()
+    warm_legal_contexts()
+
+
+async def flush_feedback_pipeline():
+    await run_in_threadpool(reward_aggregator.stop)
+    await run_in_threadpool(document_jobs.stop)
+    if feedback_log is not None:
+        await run_in_threadpool(feedback_log.close)
+    await run_in_threadpool(shutdown_pool)
+    await catalog.close()
+    await async_engine.dispose()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await load_datasets()
+    await load_catalog()
+    start_feedback_pipeline()
+    yield
+    await flush_feedback_pipeline()
 
 # =====================================================
 # FASTAPI APP
 # =====================================================
-app = FastAPI(title="Nyaya RL Decision Engine")
+app = FastAPI(title="Nyaya RL Decision Engine", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -49,6 +277,9 @@ app.add_middleware(
     allow_credentials=True
 )
 
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # =====================================================
 # DB DEPENDENCY
 # =====================================================
@@ -67,100 +298,35 @@ class DecisionRequest(BaseModel):
     jurisdiction: str
     domain_id: str
     case_summary: str
+    # Facts from /api/v1/upload; extracted from case_summary when omitted.
+    facts: Optional[Dict[str, Any]] = None
+
+    @field_validator("jurisdiction", "domain_id", "user_type")
+    @classmethod
+    def key_part_is_not_rollup(cls, value: str, info: ValidationInfo) -> str:
+        # "*" names the jurisdiction and domain rollup states.
+        if value == ANY:
+            raise ValueError(f"{info.field_name} {ANY!r} is reserved")
+        return value
 
 
 class FeedbackRequest(BaseModel):
     state_key: str
     action_key: str
     vote: Optional[str] = None
-    time_spent: int = 0
+    # Seconds; bounded so it fits the feedback log record.
+    time_spent: int = Field(0, ge=0, le=2**31 - 1)
     follow_up: bool = False
+    # Returned by /api/v1/decision in contextual mode.
+    context_id: Optional[str] = None
 
-# =====================================================
-# LOCAL NYAYA LKA STUB (STRICT CONTRACT)
-# =====================================================
-LKA_ROUTES = {
-    "IN_RENT_EVICTION": [
-        {
-            "route_id": "IN_EVICTION_NOTICE",
-            "domain_id": "IN_RENT_EVICTION",
-            "route_name": "Legal Eviction via Notice",
-            "procedure_ids": [
-                "IN_EVICT_NOTICE",
-                "IN_EVICT_FILE",
-                "IN_EVICT_HEARING"
-            ]
-        }
-    ]
-}
-
-LKA_PROCEDURES = {
-    "IN_EVICT_NOTICE": {
-        "procedure_id": "IN_EVICT_NOTICE",
-        "steps": [
-            {
-                "step": 1,
-                "action": "Serve legal notice",
-                "statute": "TPA Section 106",
-                "min_days": 15,
-                "max_days": 30
-            }
-        ],
-        "failure_paths": ["NO_RESPONSE", "INVALID_NOTICE"],
-        "appeal_available": True
-    },
-    "IN_EVICT_FILE": {
-        "procedure_id": "IN_EVICT_FILE",
-        "steps": [
-            {
-                "step": 1,
-                "action": "File eviction suit",
-                "statute": "Rent Control Act",
-                "min_days": 30,
-                "max_days": 90
-            }
-        ],
-        "failure_paths": ["CASE_DISMISSED"],
-        "appeal_available": True
-    },
-    "IN_EVICT_HEARING": {
-        "procedure_id": "IN_EVICT_HEARING",
-        "steps": [
-            {
-                "step": 1,
-                "action": "Court hearing",
-                "statute": "Civil Procedure Code",
-                "min_days": 60,
-                "max_days": 180
-            }
-        ],
-        "failure_paths": ["ADJOURNMENT"],
-        "appeal_available": True
-    }
-}
-
-LKA_EVIDENCE = {
-    pid: {
-        "procedure_id": pid,
-        "required_documents": [
-            "Rent Agreement",
-            "Ownership Proof",
-            "Previous Notices"
-        ],
-        "optional_documents": ["Witness affidavit"]
-    }
-    for pid in LKA_PROCEDURES
-}
-
-LKA_OUTCOMES = {
-    pid: {
-        "procedure_id": pid,
-        "success_range": [0.55, 0.75],
-        "escalation_risk": 0.2,
-        "wrong_route_penalty": 0.4
-    }
-    for pid in LKA_PROCEDURES
-}
+    @field_validator("state_key")
+    @classmethod
+    def state_key_is_not_rollup(cls, value: str) -> str:
+        # Rollups only change through the states they aggregate.
+        if is_rollup(value):
+            raise ValueError("Feedback cannot target a rollup state")
+        return value
 
 # =====================================================
 # RL CORE
@@ -182,146 +348,474 @@ def calculate_reward(vote, time_spent, follow_up):
     return reward
 
 
+@timed("update_memory")
 def update_memory(db, state_key, action_key, reward):
-    record = db.query(AgentMemory).filter(
-        AgentMemory.state_key == state_key,
-        AgentMemory.action_key == action_key
-    ).first()
-
-    if not record:
-        record = AgentMemory(
-            state_key=state_key,
-            action_key=action_key,
-            total_reward=reward,
-            times_used=1,
-            avg_reward=reward
-        )
-        db.add(record)
-    else:
-        record.total_reward += reward
-        record.times_used += 1
-        record.avg_reward = record.total_reward / record.times_used
-
+    memory_backend.apply(
+        db,
+        new_batch_id(),
+        {(state_key, action_key): (reward, 1)}
+    )
     db.commit()
+    score_cache.invalidate(with_rollups([state_key]))
 
 
-def select_best_route(db, state_key, routes):
-    memories = db.query(AgentMemory).filter(
-        AgentMemory.state_key == state_key
-    ).all()
-
-    score_map = {m.action_key: m.avg_reward for m in memories}
-
-    best = routes[0]
-    best_score = score_map.get(best["route_id"], 0.0)
-
-    for r in routes:
-        score = score_map.get(r["route_id"], 0.0)
-        if score > best_score:
-            best = r
-            best_score = score
-
-    return best
-
-# =====================================================
-# DOCUMENT PARSER
-# =====================================================
-def extract_text_from_pdf(file_bytes):
-    doc = fitz.open(stream=file_bytes, filetype="pdf")
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    doc.close()
-    return text
-
-
-def extract_legal_facts(text):
-    facts = {}
-    dates = re.findall(r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}", text)
-    if dates:
-        facts["dates"] = dates[:5]
-
-    amounts = re.findall(r"₹\s?\d+(?:,\d+)*(?:\.\d+)?", text)
-    if amounts:
-        facts["amounts"] = amounts[:5]
-
-    return facts
+@timed("update_memory")
+async def update_memory_async(db, state_key, action_key, reward):
+    await memory_backend.apply_async(
+        db,
+        new_batch_id(),
+        {(state_key, action_key): (reward, 1)}
+    )
+    await db.commit()
+    score_cache.invalidate(with_rollups([state_key]))
+
+
+def _score_query(state_keys):
+    return select(
+        AgentMemory.state_key,
+        AgentMemory.action_key,
+        *(getattr(AgentMemory, field) for field in FIELDS)
+    ).where(AgentMemory.state_key.in_(state_keys))
+
+
+def _split_cached_scores(state_keys):
+    """
+    Return (scores, missing, generation): cached RouteStats for the hits,
+    empty RouteStats for the misses, and the cache generation to fill with.
+    """
+    scores = {}
+    missing = []
+    for state_key in state_keys:
+        stats = score_cache.get(state_key)
+        if stats is None:
+            missing.append(state_key)
+            scores[state_key] = RouteStats()
+        else:
+            scores[state_key] = stats
+    return scores, missing, score_cache.generation()
+
+
+def _fill_scores(scores, rows):
+    for state_key, action_key, *values in rows:
+        scores[state_key].by_action[action_key] = tuple(values)
+
+
+def _chunks(state_keys):
+    for start in range(0, len(state_keys), SCORE_QUERY_CHUNK):
+        yield state_keys[start:start + SCORE_QUERY_CHUNK]
+
+
+def _sync_score_cache(db):
+    if memory_backend.shared and score_cache.sync_due():
+        score_cache.sync(memory_backend.read_version(db))
+
+
+async def _sync_score_cache_async(db):
+    if memory_backend.shared and score_cache.sync_due():
+        score_cache.sync(await memory_backend.read_version_async(db))
+
+
+def load_route_scores_many(db, state_keys):
+    _sync_score_cache(db)
+    scores, missing, generation = _split_cached_scores(state_keys)
+    if missing:
+        for chunk in _chunks(missing):
+            _fill_scores(scores, db.execute(_score_query(chunk)))
+        for state_key in missing:
+            score_cache.put(state_key, scores[state_key], generation)
+    return scores
+
+
+async def load_route_scores_many_async(db, state_keys):
+    await _sync_score_cache_async(db)
+    scores, missing, generation = _split_cached_scores(state_keys)
+    if missing:
+        for chunk in _chunks(missing):
+            _fill_scores(scores, await db.execute(_score_query(chunk)))
+        for state_key in missing:
+            score_cache.put(state_key, scores[state_key], generation)
+    return scores
+
+
+def load_route_scores(db, state_key):
+    return load_route_scores_many(db, [state_key])[state_key]
+
+
+def decision_context(item):
+    """
+    Feature vector for a decision request, or None outside contextual mode.
+    """
+    if contextual_router is None:
+        return None
+    facts = item.facts
+    if facts is None:
+        facts = extract_legal_facts(item.case_summary, item.domain_id)
+    return contextual_router.context(item.case_summary, facts)
+
+
+def choose_route(scores, state_key, domain_id, routes, rank_by=None, context=None):
+    """
+    Pick a route for state_key. scores must hold RouteStats for the state
+    and its rollups (see with_rollups), which back it off when it has
+    little feedback of its own.
+    """
+    # Taken from routes itself, so indexes match even if the catalog was
+    # swapped since the caller looked routes up.
+    route_ids = tuple(route["route_id"] for route in routes)
+    if context is not None:
+        index = contextual_router.select(state_key, route_ids, context)
+        if index is not None:
+            return routes[index]
+
+    rank_by = rank_by or reward_statistics.rank_by_for(domain_id)
+    now = time.time()
+    totals, counts = backoff([
+        reward_statistics.rank_arrays(scores[key].matrix(route_ids), rank_by, now)
+        for key in (state_key, *rollup_keys(state_key))
+    ])
+    return routes[route_policies.for_domain(domain_id).select(totals, counts)]
+
+
+@timed("select_best_route")
+def select_best_route(db, state_key, domain_id, routes, rank_by=None, context=None):
+    scores = load_route_scores_many(db, with_rollups([state_key]))
+    return choose_route(scores, state_key, domain_id, routes, rank_by, context)
+
+
+@timed("select_best_route")
+async def select_best_route_async(db, state_key, domain_id, routes, rank_by=None, context=None):
+    scores = await load_route_scores_many_async(db, with_rollups([state_key]))
+    return choose_route(scores, state_key, domain_id, routes, rank_by, context)
 
 # =====================================================
 # API: DECISION
 # =====================================================
 @app.post("/api/v1/decision")
-def make_decision(payload: DecisionRequest, db: Session = Depends(get_db)):
+async def make_decision(
+    payload: DecisionRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
     state_key = build_state_key(
         payload.jurisdiction,
         payload.domain_id,
         payload.user_type
     )
 
-    routes = LKA_ROUTES.get(payload.domain_id)
+    # One catalog version serves the whole request, even across a reload.
+    catalog_data = catalog.data
+    routes = catalog_data.routes_for(payload.domain_id)
     if not routes:
         raise HTTPException(400, "No legal routes available")
 
-    chosen_route = select_best_route(db, state_key, routes)
+    with span("decision_context"):
+        context = decision_context(payload)
 
-    procedures = [
-        LKA_PROCEDURES[pid]
-        for pid in chosen_route["procedure_ids"]
-    ]
+    chosen_route = await select_best_route_async(
+        db,
+        state_key,
+        payload.domain_id,
+        routes,
+        context=context
+    )
+    route_payload = catalog_data.payloads.get(chosen_route["route_id"])
+
+    with span("render_decision"):
+        content = render_decision(
+            state_key,
+            payload.jurisdiction,
+            payload.domain_id,
+            route_payload,
+            context_id=encode_context(context) if context is not None else None
+        )
+    return Response(content=content, media_type="application/json")
 
-    evidence = [
-        LKA_EVIDENCE[p["procedure_id"]]
-        for p in procedures
+# =====================================================
+# API: BATCH DECISION
+# =====================================================
+def render_batch_error(index, status_code, detail):
+    return b"".join([
+        b'{"index":', encode_json(index),
+        b',"error":', encode_json({"status_code": status_code, "detail": detail}),
+        b"}",
+    ])
+
+
+def render_batch_item(index, item, state_key, scores, catalog_data):
+    if isinstance(item, ValidationError):
+        return render_batch_error(
+            index, 422, item.errors(include_url=False, include_context=False)
+        )
+    routes = catalog_data.routes_for(item.domain_id)
+    if not routes:
+        return render_batch_error(index, 400, "No legal routes available")
+
+    context = decision_context(item)
+    chosen_route = choose_route(scores, state_key, item.domain_id, routes, context=context)
+    return b"".join([
+        b'{"index":', encode_json(index),
+        b',"decision":', render_decision(
+            state_key,
+            item.jurisdiction,
+            item.domain_id,
+            catalog_data.payloads.get(chosen_route["route_id"]),
+            context_id=encode_context(context) if context is not None else None
+        ),
+        b"}",
+    ])
+
+
+@app.post("/api/v1/decision/batch")
+async def make_decisions(
+    raw_payloads: List[Any] = Body(...),
+    stream: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    if len(raw_payloads) > DECISION_BATCH_MAX_ITEMS:
+        raise HTTPException(413, f"A batch holds at most {DECISION_BATCH_MAX_ITEMS} decisions")
+
+    # Items are validated one by one, so a malformed item gets its own
+    # 422 result instead of failing the whole batch.
+    payloads = []
+    for raw in raw_payloads:
+        try:
+            payloads.append(DecisionRequest.model_validate(raw))
+        except ValidationError as exc:
+            payloads.append(exc)
+    state_keys = [
+        None if isinstance(p, ValidationError)
+        else build_state_key(p.jurisdiction, p.domain_id, p.user_type)
+        for p in payloads
     ]
+    # One IN (...) query covers every distinct state in the batch and
+    # its rollups.
+    scores = await load_route_scores_many_async(
+        db, with_rollups(key for key in state_keys if key is not None)
+    )
 
-    outcomes = [
-        LKA_OUTCOMES[p["procedure_id"]]
-        for p in procedures
-    ]
+    catalog_data = catalog.data
+    items = (
+        render_batch_item(i, item, state_key, scores, catalog_data)
+        for i, (item, state_key) in enumerate(zip(payloads, state_keys))
+    )
 
-    return {
-        "state_key": state_key,
-        "jurisdiction": payload.jurisdiction,
-        "domain_id": payload.domain_id,
-        "chosen_route": chosen_route,
-        "procedures": procedures,
-        "evidence": evidence,
-        "outcomes": outcomes
-    }
+    if stream:
+        return StreamingResponse(
+            (line + b"\n" for line in items),
+            media_type="application/x-ndjson"
+        )
+
+    return Response(
+        content=b'{"results":[' + b",".join(items) + b"]}",
+        media_type="application/json"
+    )
 
 # =====================================================
 # API: FEEDBACK
 # =====================================================
 @app.post("/api/v1/feedback")
-def feedback(payload: FeedbackRequest, db: Session = Depends(get_db)):
+async def feedback(payload: FeedbackRequest):
+    context = None
+    if payload.context_id and contextual_router is not None:
+        try:
+            context = decode_context(payload.context_id, contextual_router.dim)
+        except ValueError as exc:
+            raise HTTPException(400, str(exc))
+
+    # The append writes and flushes a file, so it runs off the event loop.
+    if feedback_log is not None:
+        await run_in_threadpool(
+            feedback_log.append,
+            payload.state_key,
+            payload.action_key,
+            payload.vote,
+            payload.time_spent,
+            payload.follow_up
+        )
     reward = calculate_reward(
         payload.vote,
         payload.time_spent,
         payload.follow_up
     )
-    update_memory(
-        db,
+    reward_aggregator.add(
         payload.state_key,
         payload.action_key,
         reward
     )
+    # Only routes the state can actually be given get a contextual model,
+    # so client-supplied action keys cannot allocate new ones.
+    if context is not None:
+        if payload.action_key in catalog.data.route_ids_for_state(payload.state_key):
+            contextual_router.update(payload.state_key, payload.action_key, context, reward)
     return {"status": "recorded", "reward": reward}
 
 # =====================================================
 # API: DOCUMENT UPLOAD
 # =====================================================
 @app.post("/api/v1/upload")
-async def upload_document(file: UploadFile = File(...)):
-    text = extract_text_from_pdf(await file.read())
-    facts = extract_legal_facts(text)
+async def upload_document(
+    file: UploadFile = File(...),
+    domain_id: Optional[str] = None
+):
+    collector = FactCollector(domain_id)
+    path = await run_in_threadpool(spool_to_tempfile, file.file)
+    UPLOAD_BYTES.inc(os.path.getsize(path))
+    try:
+        text = await run_in_threadpool(
+            extract_text_from_path,
+            path,
+            max_pages=PDF_MAX_PAGES or None,
+            stop_when=collector.feed
+        )
+    finally:
+        os.unlink(path)
+
     return {
-        "facts": facts,
+        "facts": collector.facts(),
         "preview": text[:1000]
     }
 
+
+@app.post("/api/v1/upload/jobs", status_code=202)
+async def submit_document_job(
+    file: UploadFile = File(...),
+    domain_id: Optional[str] = None
+):
+    # Refuse before spooling so a full queue costs no disk writes.
+    if not document_jobs.has_capacity():
+        raise HTTPException(429, "Document queue is full", headers={"Retry-After": "5"})
+
+    path = await run_in_threadpool(spool_to_tempfile, file.file)
+    UPLOAD_BYTES.inc(os.path.getsize(path))
+    try:
+        job = document_jobs.submit(path, domain_id)
+    except JobQueueFull as exc:
+        os.unlink(path)
+        raise HTTPException(429, str(exc), headers={"Retry-After": "5"})
+    return job.describe()
+
+
+@app.get("/api/v1/upload/jobs/{job_id}")
+def document_job_status(job_id: str):
+    job = document_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    return job.describe()
+
+
+@app.get("/api/v1/upload/jobs/{job_id}/result")
+def document_job_result(job_id: str):
+    job = document_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    if job.result is None:
+        raise HTTPException(409, f"Job is {job.status}")
+    return job.result
+
+# =====================================================
+# API: LEGAL CONTEXT
+# =====================================================
+@app.get("/api/v1/legal-context/{country}/{domain_id}/{route_id}")
+def legal_context(request: Request, country: str, domain_id: str, route_id: str):
+    response = legal_context_responses.response(
+        request,
+        ("context", country, domain_id, route_id),
+        context_version(country),
+        lambda: get_legal_context(country, domain_id, route_id)
+    )
+    if response is None:
+        raise HTTPException(404, "Legal context not found")
+    return response
+
+
+def _domain_contexts_body(country: str, domain_id: str):
+    contexts = get_domain_contexts(country, domain_id)
+    if contexts is None:
+        return None
+    return {
+        "country": country,
+        "domain": domain_id,
+        "contexts": contexts
+    }
+
+
+@app.get("/api/v1/legal-context/{country}/{domain_id}")
+def domain_legal_contexts(request: Request, country: str, domain_id: str):
+    response = legal_context_responses.response(
+        request,
+        ("domain", country, domain_id),
+        context_version(country),
+        lambda: _domain_contexts_body(country, domain_id)
+    )
+    if response is None:
+        raise HTTPException(404, "Domain not found")
+    return response
+
+# =====================================================
+# API: ADMIN
+# =====================================================
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if ADMIN_TOKEN and not hmac.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(403, "Admin token required")
+
+
+@app.get("/api/v1/admin/catalog", dependencies=[Depends(require_admin)])
+def catalog_status():
+    return catalog.describe()
+
+
+@app.get("/api/v1/admin/datasets", dependencies=[Depends(require_admin)])
+def dataset_status():
+    """
+    Nyaya dataset files that failed to load, and entries that do not match
+    the legal context schema, by country and file.
+    """
+    store = get_store()
+    return {
+        "load_errors": [
+            {"country": country, "file": filename, "error": error}
+            for (country, filename), error in sorted(store.load_errors().items())
+        ],
+        "schema_errors": [
+            {"country": country, "file": filename, "entries": entries}
+            for (country, filename), entries in sorted(store.validation_errors().items())
+        ],
+    }
+
+
+@app.post("/api/v1/admin/catalog/reload", dependencies=[Depends(require_admin)])
+async def reload_catalog(wait: bool = False):
+    """
+    Rebuild the catalog in the background and publish it once it
+    validates; decisions keep using the current version meanwhile. With
+    wait=true the response is sent after the reload finishes.
+    """
+    if wait:
+        try:
+            await catalog.reload()
+        except Exception as exc:
+            raise HTTPException(
+                422,
+                {"error": str(exc), "catalog": catalog.describe()}
+            )
+        return catalog.describe()
+
+    started = catalog.reload_in_background()
+    return JSONResponse(
+        {"started": started, "catalog": catalog.describe()},
+        status_code=202
+    )
+
 # =====================================================
 # HEALTH
 # =====================================================
 @app.get("/")
 def health():
     return {"status": "Nyaya RL Decision Engine running"}
+
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,317 @@
+import functools
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.memory.hierarchy import rolled_up
+from app.memory.statistics import RewardStatistics, merge_statistics
+from app.metrics import registry, span
+
+FEEDBACK_EVENTS = registry.counter(
+    "law_agent_feedback_events_total",
+    "Feedback votes accepted into the write-behind buffer."
+)
+FEEDBACK_ROWS_FLUSHED = registry.counter(
+    "law_agent_feedback_rows_flushed_total",
+    "(state_key, action_key) rows upserted by feedback flushes."
+)
+FEEDBACK_BATCHES_DUPLICATE = registry.counter(
+    "law_agent_feedback_batches_duplicate_total",
+    "Retried feedback batches found to be applied already."
+)
+FEEDBACK_BATCHES_DROPPED = registry.counter(
+    "law_agent_feedback_batches_dropped_total",
+    "Feedback batches dropped after failing max_attempts flushes."
+)
+
+logger = logging.getLogger(__name__)
+
+MemoryKey = Tuple[str, str]
+
+DEFAULT_STATISTICS = RewardStatistics()
+
+
+def new_batch_id() -> str:
+    return uuid.uuid4().hex
+
+
+def dialect_insert(dialect: str):
+    """
+    The dialect's insert() construct, which supports ON CONFLICT.
+    """
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f"Reward upserts are not supported on {dialect}")
+    return insert
+
+
+@functools.lru_cache(maxsize=None)
+def build_reward_upsert(dialect: str, model):
+    """
+    INSERT ... ON CONFLICT DO UPDATE that adds a (reward_sum, count) delta
+    to a memory row, creating it if needed, and folds it into the row's
+    decayed and windowed statistics.
+    """
+    insert = dialect_insert(dialect)
+    table = model.__table__
+    stmt = insert(table)
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.state_key, table.c.action_key],
+        set_={
+            "total_reward": table.c.total_reward + excluded.total_reward,
+            "times_used": table.c.times_used + excluded.times_used,
+            "avg_reward": (table.c.total_reward + excluded.total_reward)
+            / (table.c.times_used + excluded.times_used),
+            **merge_statistics(table, excluded),
+        }
+    )
+
+
+def reward_rows(
+    deltas: Dict[MemoryKey, Tuple[float, int]],
+    statistics: RewardStatistics = DEFAULT_STATISTICS,
+    now: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    now = time.time() if now is None else now
+    return [
+        {
+            "state_key": state_key,
+            "action_key": action_key,
+            "total_reward": total,
+            "times_used": count,
+            "avg_reward": total / count,
+            **statistics.row_values(state_key, total, count, now),
+        }
+        for (state_key, action_key), (total, count) in deltas.items()
+    ]
+
+
+def upsert_reward_deltas(
+    db: Session,
+    model,
+    deltas: Dict[MemoryKey, Tuple[float, int]],
+    statistics: RewardStatistics = DEFAULT_STATISTICS,
+    now: Optional[float] = None
+) -> int:
+    """
+    Fold (reward_sum, count) deltas into the memory table with one atomic
+    upsert per key, as of time now (default: the current time). Rollup
+    states (app.memory.hierarchy) are updated in the same statement. The
+    caller commits. Returns the number of rows upserted, rollups included.
+    """
+    if not deltas:
+        return 0
+    rows = reward_rows(rolled_up(deltas), statistics, now)
+    stmt = build_reward_upsert(db.get_bind().dialect.name, model)
+    db.execute(stmt, rows)
+    return len(rows)
+
+
+async def upsert_reward_deltas_async(
+    db: AsyncSession,
+    model,
+    deltas: Dict[MemoryKey, Tuple[float, int]],
+    statistics: RewardStatistics = DEFAULT_STATISTICS,
+    now: Optional[float] = None
+) -> int:
+    if not deltas:
+        return 0
+    rows = reward_rows(rolled_up(deltas), statistics, now)
+    stmt = build_reward_upsert(db.bind.dialect.name, model)
+    await db.execute(stmt, rows)
+    return len(rows)
+
+
+class RewardAggregator:
+    """
+    Write-behind buffer for feedback rewards.
+
+    Votes are summed in memory per (state_key, action_key) and written as a
+    single transaction when the oldest pending vote is max_staleness seconds
+    old or max_pending keys are waiting, whichever comes first.
+
+    Each batch is given an id when it is taken from the buffer. A batch
+    that fails to commit is retried as is, under the same id, before any
+    newer votes, so a backend that records batch ids applies it once even
+    if the failed attempt did reach the database.
+
+    Failed flushes are retried with exponential backoff. A batch that
+    fails max_attempts times is logged in full and dropped, so one batch
+    the database keeps rejecting cannot hold back the votes behind it.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        backend,
+        max_staleness: float = 1.0,
+        max_pending: int = 500,
+        on_flush: Optional[Callable[[Iterable[MemoryKey]], None]] = None,
+        max_attempts: int = 5,
+        max_backoff: float = 60.0
+    ):
+        self.session_factory = session_factory
+        self.backend = backend
+        self.max_staleness = max_staleness
+        self.max_pending = max_pending
+        self.on_flush = on_flush
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+
+        self._pending: Dict[MemoryKey, Tuple[float, int]] = {}
+        # (batch_id, deltas, failed attempts) of a batch whose last flush
+        # attempt failed.
+        self._retry: Optional[Tuple[str, Dict[MemoryKey, Tuple[float, int]], int]] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    # -------------------------
+    # INGESTION
+    # -------------------------
+
+    def add(self, state_key: str, action_key: str, reward: float):
+        key = (state_key, action_key)
+        with self._lock:
+            total, count = self._pending.get(key, (0.0, 0))
+            self._pending[key] = (total + reward, count + 1)
+            full = len(self._pending) >= self.max_pending
+
+        FEEDBACK_EVENTS.inc()
+        self.start()
+        if full:
+            self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            retrying = len(self._retry[1]) if self._retry else 0
+            return len(self._pending) + retrying
+
+    # -------------------------
+    # FLUSHING
+    # -------------------------
+
+    def flush(self, final: bool = False) -> int:
+        """
+        Write the batch left by a failed flush, if any, then the pending
+        votes. Returns the number of keys written. A final flush (on stop)
+        has no later attempt to leave a failed batch for, so it drops the
+        batch to the log instead of raising.
+        """
+        with self._flush_lock:
+            written = 0
+            if self._retry is not None:
+                written += self._attempt(final)
+
+            with self._lock:
+                if not self._pending:
+                    return written
+                self._retry = (new_batch_id(), self._pending, 0)
+                self._pending = {}
+
+            written += self._attempt(final)
+            return written
+
+    def _attempt(self, final: bool = False) -> int:
+        """
+        Write the batch in self._retry. A failure re-raises and leaves the
+        batch for the next flush, unless it was the batch's last attempt
+        or the final flush.
+        """
+        batch_id, batch, failures = self._retry
+        try:
+            written = self._write(batch_id, batch)
+        except Exception:
+            failures += 1
+            if failures < self.max_attempts and not final:
+                self._retry = (batch_id, batch, failures)
+                raise
+            self._retry = None
+            self._dead_letter(batch_id, batch, failures)
+            return 0
+        self._retry = None
+        return written
+
+    def _dead_letter(self, batch_id: str, batch: Dict[MemoryKey, Tuple[float, int]], failures: int):
+        FEEDBACK_BATCHES_DROPPED.inc()
+        # The deltas go to the log in full so they can be replayed by hand.
+        logger.exception(
+            "Dropping reward batch %s after %d failed attempts: %s",
+            batch_id, failures, json.dumps([
+                [state_key, action_key, total, count]
+                for (state_key, action_key), (total, count) in batch.items()
+            ])
+        )
+
+    def _write(self, batch_id: str, batch: Dict[MemoryKey, Tuple[float, int]]) -> int:
+        db = self.session_factory()
+        try:
+            with span("update_memory.flush"):
+                applied = self.backend.apply(db, batch_id, batch)
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if not applied:
+            FEEDBACK_BATCHES_DUPLICATE.inc()
+            logger.info("Reward batch %s was already applied", batch_id)
+        else:
+            FEEDBACK_ROWS_FLUSHED.inc(len(batch))
+        if self.on_flush:
+            self.on_flush(batch.keys())
+        return len(batch) if applied else 0
+
+    def _backoff(self, failures: int) -> float:
+        return min(self.max_staleness * 2 ** (failures - 1), self.max_backoff)
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.max_staleness)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Reward flush failed; batch will be retried")
+                retry = self._retry
+                # Woken early only by stop(), which flushes one last time.
+                self._stopped.wait(self._backoff(retry[2] if retry else 1))
+
+    # -------------------------
+    # LIFECYCLE
+    # -------------------------
+
+    def start(self):
+        if self._thread is not None or self._stopping:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="reward-aggregator",
+                    daemon=True
+                )
+                self._thread.start()
+
+    def stop(self):
+        self._stopping = True
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush(final=True)
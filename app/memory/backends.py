@@ -0,0 +1,187 @@
+"""
+Storage backends for the RL memory.
+
+A backend decides how reward deltas reach agent_memory and how a worker
+learns that another process has changed it:
+
+- local: one process owns the database (the default). Deltas are upserted
+  as they are; the score cache is invalidated in-process only.
+- shared: any number of workers, on one or several nodes, share the
+  database at DATABASE_URL. Point it at PostgreSQL for a server database,
+  or at a SQLite file as a single-node stand-in. Every batch carries an id
+  recorded in applied_batches in the same transaction as its upserts, so
+  a retried batch is applied exactly once, and every write bumps the
+  memory_version counter that workers poll to drop stale cache entries.
+
+Methods take the caller's session and leave committing to the caller,
+like upsert_reward_deltas.
+"""
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.memory.aggregator import (
+    DEFAULT_STATISTICS,
+    MemoryKey,
+    dialect_insert,
+    upsert_reward_deltas,
+    upsert_reward_deltas_async,
+)
+from app.memory.models import AgentMemory, AppliedBatch, MemoryVersion
+from app.memory.statistics import RewardStatistics
+
+MEMORY_VERSION_ID = 1
+
+Deltas = Dict[MemoryKey, Tuple[float, int]]
+
+
+class MemoryBackend:
+    name = "base"
+    # Whether other processes write to the same memory.
+    shared = False
+
+    def __init__(self, statistics: RewardStatistics = DEFAULT_STATISTICS):
+        self.statistics = statistics
+
+    def apply(self, db: Session, batch_id: str, deltas: Deltas) -> bool:
+        """
+        Fold a batch of deltas into agent_memory. Returns False if the
+        batch had already been applied.
+        """
+        raise NotImplementedError
+
+    async def apply_async(self, db: AsyncSession, batch_id: str, deltas: Deltas) -> bool:
+        raise NotImplementedError
+
+    def read_version(self, db: Session) -> Optional[int]:
+        """
+        Counter that changes whenever any worker writes to the memory, or
+        None if only this process writes to it.
+        """
+        return None
+
+    async def read_version_async(self, db: AsyncSession) -> Optional[int]:
+        return None
+
+
+class LocalMemoryBackend(MemoryBackend):
+    name = "local"
+
+    def apply(self, db: Session, batch_id: str, deltas: Deltas) -> bool:
+        upsert_reward_deltas(db, AgentMemory, deltas, self.statistics)
+        return True
+
+    async def apply_async(self, db: AsyncSession, batch_id: str, deltas: Deltas) -> bool:
+        await upsert_reward_deltas_async(db, AgentMemory, deltas, self.statistics)
+        return True
+
+
+class SharedMemoryBackend(MemoryBackend):
+    name = "shared"
+    shared = True
+
+    def __init__(
+        self,
+        statistics: RewardStatistics = DEFAULT_STATISTICS,
+        batch_retention: float = 86400.0,
+        prune_interval: float = 3600.0
+    ):
+        super().__init__(statistics)
+        # Batch ids are kept long enough to outlive any retry of the batch.
+        self.batch_retention = batch_retention
+        self.prune_interval = prune_interval
+        self._last_prune = 0.0
+
+    # -------------------------
+    # STATEMENTS
+    # -------------------------
+
+    def _claim(self, dialect: str, batch_id: str):
+        insert = dialect_insert(dialect)
+        return insert(AppliedBatch.__table__).values(
+            batch_id=batch_id,
+            applied_at=time.time()
+        ).on_conflict_do_nothing(index_elements=["batch_id"])
+
+    def _bump(self, dialect: str):
+        insert = dialect_insert(dialect)
+        table = MemoryVersion.__table__
+        return insert(table).values(
+            id=MEMORY_VERSION_ID,
+            version=1
+        ).on_conflict_do_update(
+            index_elements=[table.c.id],
+            set_={"version": table.c.version + 1}
+        )
+
+    def _version_query(self):
+        return select(MemoryVersion.version).where(MemoryVersion.id == MEMORY_VERSION_ID)
+
+    def _prune(self):
+        now = time.time()
+        if now - self._last_prune < self.prune_interval:
+            return None
+        self._last_prune = now
+        return delete(AppliedBatch).where(
+            AppliedBatch.applied_at < now - self.batch_retention
+        )
+
+    # -------------------------
+    # SYNC
+    # -------------------------
+
+    def apply(self, db: Session, batch_id: str, deltas: Deltas) -> bool:
+        dialect = db.get_bind().dialect.name
+        if db.execute(self._claim(dialect, batch_id)).rowcount == 0:
+            return False
+        upsert_reward_deltas(db, AgentMemory, deltas, self.statistics)
+        self.bump_version(db)
+        prune = self._prune()
+        if prune is not None:
+            db.execute(prune)
+        return True
+
+    def bump_version(self, db: Session):
+        """
+        Tell every worker to drop its cached scores, e.g. after agent_memory
+        was rebuilt outside the running application.
+        """
+        db.execute(self._bump(db.get_bind().dialect.name))
+
+    def read_version(self, db: Session) -> Optional[int]:
+        return db.execute(self._version_query()).scalar() or 0
+
+    # -------------------------
+    # ASYNC
+    # -------------------------
+
+    async def apply_async(self, db: AsyncSession, batch_id: str, deltas: Deltas) -> bool:
+        dialect = db.bind.dialect.name
+        if (await db.execute(self._claim(dialect, batch_id))).rowcount == 0:
+            return False
+        await upsert_reward_deltas_async(db, AgentMemory, deltas, self.statistics)
+        await db.execute(self._bump(dialect))
+        prune = self._prune()
+        if prune is not None:
+            await db.execute(prune)
+        return True
+
+    async def read_version_async(self, db: AsyncSession) -> Optional[int]:
+        return (await db.execute(self._version_query())).scalar() or 0
+
+
+MEMORY_BACKENDS = {
+    "local": LocalMemoryBackend,
+    "shared": SharedMemoryBackend,
+}
+
+
+def make_memory_backend(name: str, **options) -> MemoryBackend:
+    try:
+        backend = MEMORY_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown memory backend: {name}") from None
+    return backend(**options)
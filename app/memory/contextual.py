@@ -0,0 +1,233 @@
+"""
+Case-aware route scoring: a linear contextual bandit (LinUCB) per state.
+
+A case is turned into a fixed-width feature vector by hashing the words
+of its summary and its extracted facts (dates, rupee amounts, party
+roles, sections) into dim buckets; no vocabulary or model is trained.
+Each route of a state then keeps a ridge-regression model of reward
+given the features. Models are updated in place from feedback with a
+rank-one (Sherman-Morrison) update of the inverse design matrix, so
+learning and scoring cost O(routes * dim^2) whatever the history length.
+
+The vector a decision was made on travels with it as context_id, so
+whichever worker receives the feedback can apply the update without
+keeping per-request state. Models live in process memory: every worker
+learns from the feedback it receives and starts empty after a restart,
+when selection falls back to the state's reward statistics.
+"""
+import base64
+import binascii
+import math
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+
+_TOKEN = re.compile(r"\w+")
+_DIGITS = re.compile(r"\d+(?:\.\d+)?")
+
+# Only the start of a long summary is hashed, which bounds the cost per
+# decision; the facts carry what matters in the rest of a filing.
+MAX_SUMMARY_TOKENS = 512
+
+
+class FeatureHasher:
+    """
+    Hashes a case summary and its facts into a unit-length vector of dim
+    floats. Slot 0 is a constant bias term. Buckets come from CRC-32, so
+    every process maps a case to the same vector.
+    """
+
+    def __init__(self, dim: int = 64):
+        if dim < 2:
+            raise ValueError("Feature dimension must be at least 2")
+        self.dim = dim
+
+    def _slot(self, feature: str) -> Tuple[int, float]:
+        h = zlib.crc32(feature.encode("utf-8"))
+        # The top bit picks the sign, so colliding features tend to cancel
+        # out rather than pile up.
+        return 1 + (h & 0x7FFFFFFF) % (self.dim - 1), -1.0 if h & 0x80000000 else 1.0
+
+    def _fact_features(self, facts: Mapping[str, Any]) -> Iterable[str]:
+        for name, value in facts.items():
+            yield f"fact:{name}"
+            values = value if isinstance(value, (list, tuple)) else [value]
+            for item in values:
+                item = str(item).lower()
+                if name == "amounts":
+                    # Amounts matter by order of magnitude, not exact value.
+                    digits = _DIGITS.search(item.replace(",", ""))
+                    if digits and float(digits.group()) > 0:
+                        yield f"amount:1e{int(math.log10(float(digits.group())))}"
+                elif name != "dates":
+                    yield f"fact:{name}={' '.join(item.split())}"
+
+    def vector(self, case_summary: str, facts: Optional[Mapping[str, Any]] = None) -> np.ndarray:
+        features = [
+            f"w:{token}"
+            for token in _TOKEN.findall(case_summary.lower())[:MAX_SUMMARY_TOKENS]
+        ]
+        if facts:
+            features.extend(self._fact_features(facts))
+
+        x = np.zeros(self.dim, dtype=np.float64)
+        if features:
+            slots, signs = zip(*map(self._slot, features))
+            x += np.bincount(slots, weights=signs, minlength=self.dim)
+            norm = np.linalg.norm(x)
+            if norm > 0:
+                x /= norm
+        x[0] = 1.0
+        return x
+
+
+# -------------------------
+# CONTEXT IDS
+# -------------------------
+
+def encode_context(x: np.ndarray) -> str:
+    return base64.urlsafe_b64encode(x.astype("<f2").tobytes()).decode("ascii").rstrip("=")
+
+
+def decode_context(context_id: str, dim: int) -> np.ndarray:
+    """
+    Inverse of encode_context. Raises ValueError for ids that are not a
+    dim-wide vector of finite values.
+    """
+    padded = context_id + "=" * (-len(context_id) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode("ascii"))
+    except (binascii.Error, UnicodeEncodeError):
+        raise ValueError("Malformed context_id") from None
+    if len(raw) != 2 * dim:
+        raise ValueError("context_id does not match the feature dimension")
+    x = np.frombuffer(raw, dtype="<f2").astype(np.float64)
+    if not np.isfinite(x).all():
+        raise ValueError("context_id holds non-finite values")
+    return x
+
+
+# -------------------------
+# MODELS
+# -------------------------
+
+class LinUCBModel:
+    """
+    Disjoint LinUCB over one state's routes: per route, A = ridge * I +
+    sum(x x^T) and b = sum(reward * x). Only A's inverse and
+    theta = A^-1 b are stored, as stacked arrays, so all routes are scored
+    with one matrix-vector product plus one batched quadratic form.
+
+    A route gets its arrays on its first update, and at most max_routes
+    routes do; routes without them score as the untrained prior.
+    """
+
+    def __init__(self, dim: int, ridge: float = 1.0, max_routes: int = 64):
+        self.dim = dim
+        self.ridge = ridge
+        self.max_routes = max_routes
+        self.updates = 0
+        self._index: Dict[str, int] = {}
+        self._a_inv = np.empty((0, dim, dim))
+        self._b = np.empty((0, dim))
+        self._theta = np.empty((0, dim))
+
+    def _add_row(self, route_id: str) -> int:
+        row = self._index[route_id] = len(self._b)
+        self._a_inv = np.concatenate([self._a_inv, (np.eye(self.dim) / self.ridge)[None]])
+        self._b = np.concatenate([self._b, np.zeros((1, self.dim))])
+        self._theta = np.concatenate([self._theta, np.zeros((1, self.dim))])
+        return row
+
+    def scores(self, route_ids: Tuple[str, ...], x: np.ndarray, alpha: float) -> np.ndarray:
+        # Untrained routes: theta = 0 and A^-1 = I / ridge.
+        scores = np.full(len(route_ids), alpha * math.sqrt(max(x @ x, 0.0) / self.ridge))
+        known = [(i, self._index[r]) for i, r in enumerate(route_ids) if r in self._index]
+        if known:
+            positions, rows = (np.array(v, dtype=np.intp) for v in zip(*known))
+            means = self._theta[rows] @ x
+            widths = np.einsum("i,rij,j->r", x, self._a_inv[rows], x)
+            scores[positions] = means + alpha * np.sqrt(np.maximum(widths, 0.0))
+        return scores
+
+    def update(self, route_id: str, x: np.ndarray, reward: float) -> bool:
+        """
+        Returns False, learning nothing, for a new route once max_routes
+        routes have been trained.
+        """
+        row = self._index.get(route_id)
+        if row is None:
+            if len(self._index) >= self.max_routes:
+                return False
+            row = self._add_row(route_id)
+        a_inv = self._a_inv[row]
+        a_inv_x = a_inv @ x
+        a_inv -= np.outer(a_inv_x, a_inv_x) / (1.0 + x @ a_inv_x)
+        self._b[row] += reward * x
+        self._theta[row] = a_inv @ self._b[row]
+        self.updates += 1
+        return True
+
+
+class ContextualRouter:
+    """
+    LinUCB models per state_key, in a bounded LRU. select() returns None
+    for a state that has no contextual feedback yet, so the caller can
+    fall back to its usual policy. Callers should only update routes the
+    state can choose from; each model trains at most max_routes of them.
+    """
+
+    def __init__(
+        self,
+        dim: int = 64,
+        alpha: float = 1.0,
+        ridge: float = 1.0,
+        max_states: int = 1024,
+        max_routes: int = 64
+    ):
+        self.hasher = FeatureHasher(dim)
+        self.alpha = alpha
+        self.ridge = ridge
+        self.max_states = max_states
+        self.max_routes = max_routes
+        self._models: "OrderedDict[str, LinUCBModel]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def dim(self) -> int:
+        return self.hasher.dim
+
+    def context(self, case_summary: str, facts: Optional[Mapping[str, Any]] = None) -> np.ndarray:
+        return self.hasher.vector(case_summary, facts)
+
+    def select(
+        self,
+        state_key: str,
+        route_ids: Tuple[str, ...],
+        x: np.ndarray
+    ) -> Optional[int]:
+        with self._lock:
+            model = self._models.get(state_key)
+            if model is None or not model.updates:
+                return None
+            self._models.move_to_end(state_key)
+            return int(np.argmax(model.scores(route_ids, x, self.alpha)))
+
+    def update(self, state_key: str, route_id: str, x: np.ndarray, reward: float) -> bool:
+        with self._lock:
+            model = self._models.get(state_key)
+            if model is None:
+                model = LinUCBModel(self.dim, self.ridge, self.max_routes)
+                self._models[state_key] = model
+            self._models.move_to_end(state_key)
+            updated = model.update(route_id, x, reward)
+            while len(self._models) > self.max_states:
+                self._models.popitem(last=False)
+            return updated
+
+    def __len__(self) -> int:
+        return len(self._models)
@@ -0,0 +1,208 @@
+"""
+Append-only on-disk log of raw feedback events.
+
+Every accepted vote is appended as it arrives, before any reward is
+computed, so scores can later be rebuilt under a different reward
+function (see app.memory.replay).
+
+Each process writes its own series of segments,
+feedback-<writer>-<seq>.log, and rotates to a new one past segment_bytes,
+so uvicorn workers never share a file. A segment is a magic header
+followed by records of:
+
+    crc32 (u32)  timestamp (f64)  time_spent (i64)  follow_up (u8)
+    state_key length (u32)  action_key length (u32)  vote length (u32)
+    state_key, action_key, vote (UTF-8)
+
+The CRC covers everything after it. A vote length of 0xFFFFFFFF means
+no vote. Readers stop at the first torn or corrupt record of a segment,
+which is where a crashed writer left off.
+"""
+import heapq
+import itertools
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional
+
+from app.metrics import registry
+
+SEGMENT_MAGIC = b"NYFBLOG1"
+CRC = struct.Struct("<I")
+# timestamp, time_spent, follow_up, state/action/vote lengths
+BODY = struct.Struct("<dq?III")
+RECORD_HEADER_SIZE = CRC.size + BODY.size
+NO_VOTE = 0xFFFFFFFF
+
+READ_BUFFER_SIZE = 1024 * 1024
+# Larger length fields can only come from a corrupt header.
+MAX_RECORD_TEXT = 16 * 1024 * 1024
+
+FEEDBACK_LOG_BYTES = registry.counter(
+    "law_agent_feedback_log_bytes_total",
+    "Bytes appended to the feedback event log."
+)
+
+logger = logging.getLogger(__name__)
+
+
+class FeedbackEvent(NamedTuple):
+    timestamp: float
+    state_key: str
+    action_key: str
+    vote: Optional[str]
+    time_spent: int
+    follow_up: bool
+
+
+def encode_event(event: FeedbackEvent) -> bytes:
+    state = event.state_key.encode("utf-8")
+    action = event.action_key.encode("utf-8")
+    vote = event.vote.encode("utf-8") if event.vote is not None else b""
+    body = BODY.pack(
+        event.timestamp,
+        event.time_spent,
+        event.follow_up,
+        len(state),
+        len(action),
+        len(vote) if event.vote is not None else NO_VOTE,
+    ) + state + action + vote
+    return CRC.pack(zlib.crc32(body)) + body
+
+
+# -------------------------
+# WRITER
+# -------------------------
+
+class FeedbackEventLog:
+    """
+    Sequential writer for one process. Records go to the OS on every
+    append (no fsync), so a crash of the process loses nothing.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 64 * 1024 * 1024,
+        writer_id: Optional[str] = None
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.writer_id = writer_id or f"{time.time_ns()}-{os.getpid()}"
+
+        self._file: Optional[BinaryIO] = None
+        self._size = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def _open_segment(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._seq += 1
+        path = os.path.join(
+            self.directory,
+            f"feedback-{self.writer_id}-{self._seq:06d}.log"
+        )
+        self._file = open(path, "xb")
+        self._file.write(SEGMENT_MAGIC)
+        self._size = len(SEGMENT_MAGIC)
+
+    def append(
+        self,
+        state_key: str,
+        action_key: str,
+        vote: Optional[str],
+        time_spent: int,
+        follow_up: bool,
+        timestamp: Optional[float] = None
+    ):
+        record = encode_event(FeedbackEvent(
+            time.time() if timestamp is None else timestamp,
+            state_key,
+            action_key,
+            vote,
+            time_spent,
+            follow_up,
+        ))
+        with self._lock:
+            if self._file is None or self._size >= self.segment_bytes:
+                self._close_segment()
+                self._open_segment()
+            self._file.write(record)
+            self._file.flush()
+            self._size += len(record)
+        FEEDBACK_LOG_BYTES.inc(len(record))
+
+    def _close_segment(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        with self._lock:
+            self._close_segment()
+
+
+# -------------------------
+# READERS
+# -------------------------
+
+def segment_paths(directory: str) -> Dict[str, List[str]]:
+    """
+    Segment paths per writer, in write order.
+    """
+    writers: Dict[str, List[str]] = {}
+    if not os.path.isdir(directory):
+        return writers
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith("feedback-") and name.endswith(".log")):
+            continue
+        writer, _, seq = name[len("feedback-"):-len(".log")].rpartition("-")
+        if writer and seq.isdigit():
+            writers.setdefault(writer, []).append(os.path.join(directory, name))
+    return writers
+
+
+def read_segment(path: str) -> Iterator[FeedbackEvent]:
+    with open(path, "rb", buffering=READ_BUFFER_SIZE) as f:
+        if f.read(len(SEGMENT_MAGIC)) != SEGMENT_MAGIC:
+            logger.warning("Skipping %s: not a feedback log segment", path)
+            return
+
+        while True:
+            header = f.read(RECORD_HEADER_SIZE)
+            if not header:
+                return
+            if len(header) < RECORD_HEADER_SIZE:
+                logger.warning("Truncated record at the end of %s", path)
+                return
+
+            (crc,) = CRC.unpack_from(header)
+            timestamp, time_spent, follow_up, state_len, action_len, vote_len = (
+                BODY.unpack_from(header, CRC.size)
+            )
+            text_len = state_len + action_len + (0 if vote_len == NO_VOTE else vote_len)
+            text = f.read(text_len) if text_len <= MAX_RECORD_TEXT else b""
+            if len(text) < text_len or zlib.crc32(header[CRC.size:] + text) != crc:
+                logger.warning("Corrupt or truncated record in %s; skipping the rest", path)
+                return
+
+            state_key = text[:state_len].decode("utf-8")
+            action_key = text[state_len:state_len + action_len].decode("utf-8")
+            vote = None if vote_len == NO_VOTE else text[state_len + action_len:].decode("utf-8")
+            yield FeedbackEvent(timestamp, state_key, action_key, vote, time_spent, follow_up)
+
+
+def read_events(directory: str) -> Iterator[FeedbackEvent]:
+    """
+    Stream every event in the log in timestamp order. Each writer's
+    segments are already in order, so they are merged lazily rather
+    than sorted.
+    """
+    streams = [
+        itertools.chain.from_iterable(read_segment(path) for path in paths)
+        for paths in segment_paths(directory).values()
+    ]
+    return heapq.merge(*streams, key=lambda event: event.timestamp)
@@ -0,0 +1,100 @@
+"""
+Rolled-up reward statistics for cold-start routing.
+
+Every reward written for a state jurisdiction|domain|user_type is also
+folded into two rollup states, jurisdiction|domain|* and *|domain|*,
+in the same upsert. They are ordinary agent_memory rows, so they carry
+the all-time, decayed and windowed statistics and are read by the same
+query as the state itself.
+
+At selection time the levels are blended from the domain down: each
+level's own evidence (its rollup minus the more specific level, so a
+state's votes are not counted twice) is shrunk towards the level above
+with up to prior_count pseudo-observations of that level's mean. A
+state with no votes thus ranks routes as its jurisdiction, or failing
+that its domain, does; one with many votes is ranked by its own.
+"""
+import os
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+# Pseudo-observations the level above contributes at most.
+BACKOFF_PRIOR_COUNT = float(os.getenv("BACKOFF_PRIOR_COUNT", "10"))
+
+ANY = "*"
+
+Deltas = Dict[Tuple[str, str], Tuple[float, int]]
+
+
+def is_rollup(state_key: str) -> bool:
+    return ANY in state_key.split("|")
+
+
+def rollup_keys(state_key: str) -> Tuple[str, ...]:
+    """
+    Rollup states of state_key, most specific first. Keys not of the
+    jurisdiction|domain|user_type form, and rollups themselves, have none.
+    """
+    parts = state_key.split("|")
+    if len(parts) != 3 or is_rollup(state_key):
+        return ()
+    jurisdiction, domain_id, _ = parts
+    return (
+        f"{jurisdiction}|{domain_id}|{ANY}",
+        f"{ANY}|{domain_id}|{ANY}",
+    )
+
+
+def with_rollups(state_keys: Iterable[str]) -> List[str]:
+    """
+    The state keys followed by their rollups, without duplicates.
+    """
+    keys: Dict[str, None] = {}
+    for state_key in state_keys:
+        keys[state_key] = None
+        for rollup in rollup_keys(state_key):
+            keys[rollup] = None
+    return list(keys)
+
+
+def rolled_up(deltas: Deltas) -> Deltas:
+    """
+    deltas plus the matching rollup deltas. Rollups shared by several
+    states are summed, since one upsert must not touch a row twice.
+    """
+    expanded = dict(deltas)
+    for (state_key, action_key), (total, count) in deltas.items():
+        for rollup in rollup_keys(state_key):
+            key = (rollup, action_key)
+            rollup_total, rollup_count = expanded.get(key, (0.0, 0))
+            expanded[key] = (rollup_total + total, rollup_count + count)
+    return expanded
+
+
+def _means(totals: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    return np.divide(totals, counts, out=np.zeros_like(totals), where=counts > 0)
+
+
+def backoff(
+    levels: Sequence[Tuple[np.ndarray, np.ndarray]],
+    prior_count: float = BACKOFF_PRIOR_COUNT
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Blend (totals, counts) arrays given from the state up to the domain
+    rollup into the (totals, counts) the state's route policy ranks by.
+    """
+    if len(levels) == 1 or prior_count <= 0:
+        return levels[0]
+
+    # Evidence each level adds over the one below it.
+    own = [levels[0]]
+    for (totals, counts), (below_totals, below_counts) in zip(levels[1:], levels):
+        extra = np.maximum(counts - below_counts, 0.0)
+        own.append((np.where(extra > 0, totals - below_totals, 0.0), extra))
+
+    totals, counts = own[-1]
+    for own_totals, own_counts in reversed(own[:-1]):
+        weight = np.minimum(counts, prior_count)
+        totals, counts = own_totals + weight * _means(totals, counts), own_counts + weight
+    return totals, counts
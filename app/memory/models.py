@@ -1,8 +1,12 @@
-from sqlalchemy import Column, String, Float, Integer
+from sqlalchemy import Column, String, Float, Integer, Index
 from app.db.session import Base
 
 class AgentMemory(Base):
     __tablename__ = "agent_memory"
+    __table_args__ = (
+        # select_best_route filters on state_key alone.
+        Index("ix_agent_memory_state_key", "state_key"),
+    )
 
     state_key = Column(String, primary_key=True)
     action_key = Column(String, primary_key=True)
@@ -10,3 +14,40 @@ class AgentMemory(Base):
     total_reward = Column(Float, default=0.0)
     times_used = Column(Integer, default=0)
     avg_reward = Column(Float, default=0.0)
+
+    # Decayed and sliding-window statistics; see app.memory.statistics.
+    # Server defaults let migrations add them to existing tables.
+    updated_at = Column(Float, nullable=False, server_default="0")
+    half_life = Column(Float, nullable=False, server_default="0")
+    decayed_reward = Column(Float, nullable=False, server_default="0")
+    decayed_count = Column(Float, nullable=False, server_default="0")
+    window_bucket = Column(Integer, nullable=False, server_default="0")
+    window_reward = Column(Float, nullable=False, server_default="0")
+    window_count = Column(Integer, nullable=False, server_default="0")
+    prev_window_reward = Column(Float, nullable=False, server_default="0")
+    prev_window_count = Column(Integer, nullable=False, server_default="0")
+
+
+class MemoryVersion(Base):
+    """
+    Single-row counter bumped by every shared-mode write to agent_memory.
+    Workers poll it to know when their score caches are stale.
+    """
+    __tablename__ = "memory_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class AppliedBatch(Base):
+    """
+    Ids of reward batches already folded into agent_memory, so a retried
+    batch is applied exactly once.
+    """
+    __tablename__ = "applied_batches"
+    __table_args__ = (
+        Index("ix_applied_batches_applied_at", "applied_at"),
+    )
+
+    batch_id = Column(String, primary_key=True)
+    applied_at = Column(Float, nullable=False)
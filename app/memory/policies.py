@@ -0,0 +1,181 @@
+import math
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.memory.statistics import COUNT, FIELDS, TOTAL
+
+
+class RouteStats:
+    """
+    Per-state reward statistics keyed by action_key: a tuple of values in
+    app.memory.statistics.FIELDS order, starting with the all-time reward
+    total and visit count.
+
+    matrix() aligns them to a domain's route order as a NumPy array and
+    memoizes the result, since a state's route list rarely changes.
+    """
+
+    __slots__ = ("by_action", "_aligned")
+
+    def __init__(self, by_action: Optional[Dict[str, Tuple[float, ...]]] = None):
+        self.by_action = by_action or {}
+        self._aligned: Optional[Tuple[Tuple[str, ...], np.ndarray]] = None
+
+    def matrix(self, route_ids: Tuple[str, ...]) -> np.ndarray:
+        aligned = self._aligned
+        if aligned is not None and aligned[0] == route_ids:
+            return aligned[1]
+
+        matrix = np.zeros((len(route_ids), len(FIELDS)), dtype=np.float64)
+        for i, route_id in enumerate(route_ids):
+            stat = self.by_action.get(route_id)
+            if stat is not None:
+                matrix[i, :len(stat)] = stat
+
+        self._aligned = (route_ids, matrix)
+        return matrix
+
+    def arrays(self, route_ids: Tuple[str, ...]) -> Tuple[np.ndarray, np.ndarray]:
+        """All-time (totals, counts) aligned to route_ids."""
+        matrix = self.matrix(route_ids)
+        return matrix[:, TOTAL], matrix[:, COUNT]
+
+
+def _means(totals: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    return np.divide(totals, counts, out=np.zeros_like(totals), where=counts > 0)
+
+
+# -------------------------
+# POLICIES
+# -------------------------
+
+class RoutePolicy:
+    """
+    Scores every candidate route at once and picks the argmax. Ties go to
+    the earliest route, and routes with no feedback score as 0.0 unless
+    the policy says otherwise.
+    """
+
+    name = "base"
+
+    def __init__(self, seed: Optional[int] = None):
+        self._rng = np.random.default_rng(seed)
+        self._rng_lock = threading.Lock()
+
+    def scores(self, totals: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def select(self, totals: np.ndarray, counts: np.ndarray) -> int:
+        return int(np.argmax(self.scores(totals, counts)))
+
+
+class GreedyPolicy(RoutePolicy):
+    name = "greedy"
+
+    def scores(self, totals, counts):
+        return _means(totals, counts)
+
+
+class EpsilonGreedyPolicy(RoutePolicy):
+    name = "epsilon_greedy"
+
+    def __init__(self, seed: Optional[int] = None, epsilon: float = 0.1):
+        super().__init__(seed)
+        self.epsilon = epsilon
+
+    def scores(self, totals, counts):
+        return _means(totals, counts)
+
+    def select(self, totals, counts):
+        with self._rng_lock:
+            explore = self._rng.random() < self.epsilon
+            if explore:
+                return int(self._rng.integers(len(totals)))
+        return super().select(totals, counts)
+
+
+class UCB1Policy(RoutePolicy):
+    name = "ucb1"
+
+    def __init__(self, seed: Optional[int] = None, c: float = math.sqrt(2)):
+        super().__init__(seed)
+        self.c = c
+
+    def scores(self, totals, counts):
+        # Untried routes get +inf so each one is tried once first. Decayed
+        # and windowed counts can sum below 1, where log(n) would go
+        # negative.
+        n = counts.sum()
+        bonus = np.full_like(totals, np.inf)
+        seen = counts > 0
+        if n > 0:
+            bonus[seen] = self.c * np.sqrt(math.log(max(n, 1.0)) / counts[seen])
+        return _means(totals, counts) + bonus
+
+
+class ThompsonPolicy(RoutePolicy):
+    """
+    Gaussian Thompson sampling with a N(0, prior_std^2) prior per route,
+    so the posterior mean is total / (n + 1).
+    """
+
+    name = "thompson"
+
+    def __init__(self, seed: Optional[int] = None, prior_std: float = 1.0):
+        super().__init__(seed)
+        self.prior_std = prior_std
+
+    def scores(self, totals, counts):
+        mean = totals / (counts + 1.0)
+        std = self.prior_std / np.sqrt(counts + 1.0)
+        with self._rng_lock:
+            return self._rng.normal(mean, std)
+
+
+POLICIES = {
+    policy.name: policy
+    for policy in (GreedyPolicy, EpsilonGreedyPolicy, UCB1Policy, ThompsonPolicy)
+}
+
+
+def make_policy(name: str, seed: Optional[int] = None, **params) -> RoutePolicy:
+    try:
+        policy = POLICIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown route policy: {name}") from None
+    return policy(seed=seed, **params)
+
+
+class PolicySelector:
+    """
+    Resolves the policy for a domain, falling back to the default. One
+    instance is kept per domain so seeded runs are reproducible.
+    """
+
+    def __init__(
+        self,
+        default: str = "greedy",
+        by_domain: Optional[Dict[str, str]] = None,
+        seed: Optional[int] = None
+    ):
+        self.default = default
+        self.by_domain = dict(by_domain or {})
+        self.seed = seed
+        self._policies: Dict[str, RoutePolicy] = {}
+        self._lock = threading.Lock()
+        for name in (default, *self.by_domain.values()):
+            if name not in POLICIES:
+                raise ValueError(f"Unknown route policy: {name}")
+
+    def for_domain(self, domain_id: str) -> RoutePolicy:
+        policy = self._policies.get(domain_id)
+        if policy is None:
+            with self._lock:
+                policy = self._policies.get(domain_id)
+                if policy is None:
+                    name = self.by_domain.get(domain_id, self.default)
+                    policy = make_policy(name, seed=self.seed)
+                    self._policies[domain_id] = policy
+        return policy
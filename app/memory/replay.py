@@ -0,0 +1,196 @@
+"""
+Rebuild agent_memory from the feedback event log.
+
+Events are streamed from disk in timestamp order and pass through a
+generator pipeline (read -> score -> batch) into bulk upserts, so memory
+use is bounded by one batch whatever the size of the log. Each batch is
+written as of its last event's time, which keeps the decayed and
+windowed statistics faithful to when the votes were cast.
+
+Usage:
+
+    python -m app.memory.replay --log-dir ./feedback_log \\
+        --database-url sqlite:///./law_agent.replay.db \\
+        [--reward module:function] [--truncate]
+
+The reward function takes (vote, time_spent, follow_up) like
+calculate_reward. Without --truncate the replayed rewards are added to
+whatever agent_memory already holds.
+"""
+import argparse
+import importlib
+import json
+import sys
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from app.memory.aggregator import DEFAULT_STATISTICS, MemoryKey, upsert_reward_deltas
+from app.memory.backends import SharedMemoryBackend
+from app.memory.event_log import FeedbackEvent, read_events
+from app.memory.models import AgentMemory
+from app.memory.statistics import RewardStatistics
+
+DEFAULT_REWARD = "app.memory.reward:calculate_reward"
+
+RewardFunction = Callable[[Optional[str], int, bool], float]
+Batch = Tuple[float, Dict[MemoryKey, Tuple[float, int]], int]
+
+
+def load_reward_function(spec: str) -> RewardFunction:
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"Reward function must be module:function, got {spec!r}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def scored_events(
+    events: Iterable[FeedbackEvent],
+    reward_fn: RewardFunction
+) -> Iterator[Tuple[float, MemoryKey, float]]:
+    for event in events:
+        yield (
+            event.timestamp,
+            (event.state_key, event.action_key),
+            reward_fn(event.vote, event.time_spent, event.follow_up),
+        )
+
+
+def batch_span(statistics: RewardStatistics) -> float:
+    """
+    Longest stretch of time one batch may cover. Votes in a batch are
+    stamped with its last timestamp; at 1/1000 of the shortest half-life
+    that shifts their decayed weight by under 0.1%.
+    """
+    half_lives = [
+        h for h in (statistics.half_life, *statistics.half_life_by_domain.values())
+        if h > 0
+    ]
+    return min(half_lives or [statistics.window]) / 1000
+
+
+def reward_batches(
+    scored: Iterable[Tuple[float, MemoryKey, float]],
+    statistics: RewardStatistics = DEFAULT_STATISTICS,
+    batch_events: int = 50000
+) -> Iterator[Batch]:
+    """
+    Sum rewards per key into batches of at most batch_events events,
+    yielding (last timestamp, deltas, event count). A batch never spans
+    more than batch_span() seconds or two reward windows.
+    """
+    max_span = batch_span(statistics)
+    deltas: Dict[MemoryKey, Tuple[float, int]] = {}
+    events = 0
+    start = last = None
+    bucket = None
+
+    for timestamp, key, reward in scored:
+        if events and (
+            events >= batch_events
+            or timestamp - start > max_span
+            or statistics.bucket(timestamp) != bucket
+        ):
+            yield last, deltas, events
+            deltas, events = {}, 0
+        if not events:
+            start = timestamp
+            bucket = statistics.bucket(timestamp)
+        total, count = deltas.get(key, (0.0, 0))
+        deltas[key] = (total + reward, count + 1)
+        events += 1
+        last = timestamp
+
+    if events:
+        yield last, deltas, events
+
+
+def replay(
+    engine: Engine,
+    events: Iterable[FeedbackEvent],
+    reward_fn: RewardFunction,
+    statistics: RewardStatistics = DEFAULT_STATISTICS,
+    truncate: bool = False,
+    batch_events: int = 50000,
+    batches_per_commit: int = 20
+) -> Dict[str, float]:
+    """
+    Fold the events into agent_memory on engine and return a summary.
+    With truncate, the table is emptied first, in the same transaction
+    as the first batches.
+    """
+    started = time.perf_counter()
+    db = sessionmaker(bind=engine, autoflush=False)()
+    total_events = batches = rows = rollup_rows = 0
+    try:
+        if truncate:
+            db.execute(delete(AgentMemory))
+
+        for now, deltas, count in reward_batches(
+            scored_events(events, reward_fn),
+            statistics,
+            batch_events=batch_events
+        ):
+            upserted = upsert_reward_deltas(db, AgentMemory, deltas, statistics, now=now)
+            total_events += count
+            rows += upserted
+            rollup_rows += upserted - len(deltas)
+            batches += 1
+            if batches % batches_per_commit == 0:
+                db.commit()
+
+        # Workers in shared mode reload their scores on the next check.
+        SharedMemoryBackend(statistics).bump_version(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "events": total_events,
+        "batches": batches,
+        # Rollup rows are part of rows_upserted.
+        "rows_upserted": rows,
+        "rollup_rows_upserted": rollup_rows,
+        "seconds": round(elapsed, 3),
+        "events_per_second": round(total_events / elapsed) if elapsed else 0,
+    }
+
+
+def main(argv=None) -> int:
+    from app.db.migrations import upgrade
+    from app.db.session import DATABASE_URL, create_db_engine
+
+    parser = argparse.ArgumentParser(description="Rebuild agent_memory from the feedback event log.")
+    parser.add_argument("--log-dir", required=True)
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--reward", default=DEFAULT_REWARD, help="module:function")
+    parser.add_argument("--truncate", action="store_true", help="empty agent_memory first")
+    parser.add_argument("--batch-events", type=int, default=50000)
+    args = parser.parse_args(argv)
+
+    engine = create_db_engine(args.database_url)
+    upgrade(engine)
+    try:
+        summary = replay(
+            engine,
+            read_events(args.log_dir),
+            load_reward_function(args.reward),
+            truncate=args.truncate,
+            batch_events=args.batch_events
+        )
+    finally:
+        engine.dispose()
+
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from app.memory.policies import RouteStats
+
+
+class RouteScoreCache:
+    """
+    Bounded LRU map of state_key -> RouteStats.
+
+    Entries are filled from AgentMemory on a miss and invalidated whenever
+    feedback for that state is written. A fill started before an
+    invalidation is dropped, so a slow reader cannot re-cache stale scores.
+
+    When other processes write to the same memory, the cache is also
+    cleared whenever the shared memory version moves; sync_due() rations
+    the version checks to one per sync_interval seconds.
+    """
+
+    def __init__(self, max_states: int = 1024, sync_interval: float = 1.0):
+        self.max_states = max_states
+        self.sync_interval = sync_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.syncs = 0
+
+        self._generation = 0
+        self._synced_version: Optional[int] = None
+        self._synced_at = float("-inf")
+        self._scores: "OrderedDict[str, RouteStats]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, state_key: str) -> Optional[RouteStats]:
+        with self._lock:
+            scores = self._scores.get(state_key)
+            if scores is None:
+                self.misses += 1
+                return None
+            self._scores.move_to_end(state_key)
+            self.hits += 1
+            return scores
+
+    def generation(self) -> int:
+        return self._generation
+
+    def put(
+        self,
+        state_key: str,
+        scores: RouteStats,
+        generation: Optional[int] = None
+    ):
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._scores[state_key] = scores
+            self._scores.move_to_end(state_key)
+            while len(self._scores) > self.max_states:
+                self._scores.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, state_keys: Iterable[str]):
+        with self._lock:
+            self._generation += 1
+            for state_key in state_keys:
+                self._scores.pop(state_key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._scores.clear()
+
+    def sync_due(self) -> bool:
+        """
+        True at most once per sync_interval; the caller then reads the
+        shared version and passes it to sync().
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._synced_at < self.sync_interval:
+                return False
+            self._synced_at = now
+            return True
+
+    def sync(self, version: Optional[int]):
+        with self._lock:
+            if version is None or version == self._synced_version:
+                return
+            self._synced_version = version
+            self._generation += 1
+            self._scores.clear()
+            self.syncs += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._scores),
+                "max_states": self.max_states,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "syncs": self.syncs,
+            }
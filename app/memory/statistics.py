@@ -0,0 +1,234 @@
+"""
+Time-decayed and sliding-window reward statistics.
+
+Both are kept per agent_memory row and folded forward by the reward
+upsert itself, so an update costs O(1) and history is never re-read:
+
+- decayed: reward and count sums as of updated_at. Each update first
+  scales them by 2^(-elapsed / half_life), then adds the delta. Readers
+  apply the decay since updated_at.
+- window: sums for the current and previous window-length buckets.
+  Readers weight the previous bucket by how much of it still overlaps
+  the trailing window, the usual two-bucket sliding-window estimate.
+
+Rows written before these columns existed start both statistics empty.
+"""
+import json
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Float, case, cast, func, literal_column
+
+# Order of the per-action values kept in RouteStats.
+FIELDS = (
+    "total_reward",
+    "times_used",
+    "updated_at",
+    "half_life",
+    "decayed_reward",
+    "decayed_count",
+    "window_bucket",
+    "window_reward",
+    "window_count",
+    "prev_window_reward",
+    "prev_window_count",
+)
+(
+    TOTAL, COUNT, UPDATED_AT, HALF_LIFE, DECAYED_REWARD, DECAYED_COUNT,
+    WINDOW_BUCKET, WINDOW_REWARD, WINDOW_COUNT, PREV_WINDOW_REWARD,
+    PREV_WINDOW_COUNT,
+) = range(len(FIELDS))
+
+RANK_BY = ("mean", "decayed", "window")
+
+# Statistic routes are ranked by: "mean" (all-time average), "decayed"
+# (exponentially decayed, REWARD_HALF_LIFE seconds) or "window" (trailing
+# REWARD_WINDOW seconds). The *_BY_DOMAIN settings are JSON objects of
+# domain_id -> value. All three statistics are maintained on every write.
+ROUTE_RANK_BY = os.getenv("ROUTE_RANK_BY", "mean")
+ROUTE_RANK_BY_DOMAIN = json.loads(os.getenv("ROUTE_RANK_BY_DOMAIN", "{}"))
+REWARD_HALF_LIFE = float(os.getenv("REWARD_HALF_LIFE", str(7 * 86400)))
+REWARD_HALF_LIFE_BY_DOMAIN = json.loads(os.getenv("REWARD_HALF_LIFE_BY_DOMAIN", "{}"))
+REWARD_WINDOW = float(os.getenv("REWARD_WINDOW", str(7 * 86400)))
+
+# Past this many half-lives the old sums are dropped outright (2^-64 is
+# below float precision), which also keeps power() clear of underflow.
+MAX_DECAY_HALF_LIVES = 64
+
+# SQL constants are rendered inline rather than bound, so executemany
+# only processes each row's own values.
+_ZERO = literal_column("0")
+_ONE = literal_column("1")
+
+
+class RewardStatistics:
+    """
+    Decay and window settings, and the statistic each domain ranks
+    routes by. Defaults come from the environment. Domain ids are matched
+    case-insensitively, since state keys are lowercased.
+    """
+
+    def __init__(
+        self,
+        half_life: float = REWARD_HALF_LIFE,
+        half_life_by_domain: Optional[Dict[str, float]] = None,
+        window: float = REWARD_WINDOW,
+        rank_by: str = ROUTE_RANK_BY,
+        rank_by_domain: Optional[Dict[str, str]] = None
+    ):
+        if half_life_by_domain is None:
+            half_life_by_domain = REWARD_HALF_LIFE_BY_DOMAIN
+        if rank_by_domain is None:
+            rank_by_domain = ROUTE_RANK_BY_DOMAIN
+
+        self.half_life = float(half_life)
+        self.half_life_by_domain = {
+            domain.lower(): float(value)
+            for domain, value in half_life_by_domain.items()
+        }
+        self.window = float(window)
+        self.rank_by = rank_by
+        self.rank_by_domain = {
+            domain.lower(): name for domain, name in rank_by_domain.items()
+        }
+        if self.window <= 0:
+            raise ValueError("Reward window must be positive")
+        for name in (rank_by, *self.rank_by_domain.values()):
+            if name not in RANK_BY:
+                raise ValueError(f"Unknown ranking statistic: {name}")
+
+    def half_life_for(self, state_key: str) -> float:
+        parts = state_key.split("|")
+        domain_id = parts[1] if len(parts) > 1 else ""
+        return self.half_life_by_domain.get(domain_id, self.half_life)
+
+    def rank_by_for(self, domain_id: str) -> str:
+        return self.rank_by_domain.get(domain_id.lower(), self.rank_by)
+
+    def bucket(self, now: float) -> int:
+        return int(now // self.window)
+
+    # -------------------------
+    # WRITE SIDE
+    # -------------------------
+
+    def row_values(
+        self,
+        state_key: str,
+        total: float,
+        count: int,
+        now: float
+    ) -> Dict[str, Any]:
+        """
+        Decay and window columns for a (total, count) delta at time now,
+        as inserted for a new row and merged into an existing one.
+        """
+        return {
+            "updated_at": now,
+            "half_life": self.half_life_for(state_key),
+            "decayed_reward": total,
+            "decayed_count": float(count),
+            "window_bucket": self.bucket(now),
+            "window_reward": total,
+            "window_count": count,
+            "prev_window_reward": 0.0,
+            "prev_window_count": 0,
+        }
+
+    # -------------------------
+    # READ SIDE
+    # -------------------------
+
+    def rank_arrays(
+        self,
+        matrix: np.ndarray,
+        rank_by: str,
+        now: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (totals, counts) to rank by, from a RouteStats matrix with one row
+        per route and FIELDS as columns.
+        """
+        if rank_by == "mean":
+            return matrix[:, TOTAL], matrix[:, COUNT]
+
+        now = time.time() if now is None else now
+        if rank_by == "decayed":
+            half_life = matrix[:, HALF_LIFE]
+            age = np.maximum(now - matrix[:, UPDATED_AT], 0.0)
+            factor = np.ones_like(age)
+            decays = half_life > 0
+            factor[decays] = np.exp2(-age[decays] / half_life[decays])
+            return matrix[:, DECAYED_REWARD] * factor, matrix[:, DECAYED_COUNT] * factor
+
+        if rank_by == "window":
+            current = self.bucket(now)
+            overlap = 1.0 - (now % self.window) / self.window
+            bucket = matrix[:, WINDOW_BUCKET]
+            in_current = bucket == current
+            in_previous = bucket == current - 1
+            totals = np.where(
+                in_current,
+                matrix[:, WINDOW_REWARD] + matrix[:, PREV_WINDOW_REWARD] * overlap,
+                np.where(in_previous, matrix[:, WINDOW_REWARD] * overlap, 0.0)
+            )
+            counts = np.where(
+                in_current,
+                matrix[:, WINDOW_COUNT] + matrix[:, PREV_WINDOW_COUNT] * overlap,
+                np.where(in_previous, matrix[:, WINDOW_COUNT] * overlap, 0.0)
+            )
+            return totals, counts
+
+        raise ValueError(f"Unknown ranking statistic: {rank_by}")
+
+
+def merge_statistics(table, excluded) -> Dict[str, Any]:
+    """
+    ON CONFLICT SET clauses folding an incoming delta row (excluded) into
+    the stored decay and window columns. Every clause reads the stored
+    row as it was before the update.
+    """
+    elapsed = excluded.updated_at - table.c.updated_at
+    decay = case(
+        (excluded.half_life <= _ZERO, _ONE),
+        (elapsed <= _ZERO, _ONE),
+        (elapsed >= excluded.half_life * literal_column(str(MAX_DECAY_HALF_LIVES)), _ZERO),
+        else_=func.power(
+            cast(literal_column("2"), Float),
+            (table.c.updated_at - excluded.updated_at) / excluded.half_life
+        )
+    )
+
+    new_bucket = excluded.window_bucket > table.c.window_bucket
+    next_bucket = excluded.window_bucket == table.c.window_bucket + _ONE
+
+    def rolled(current, incoming):
+        # A vote from a new bucket starts it; late votes count as current.
+        return case((new_bucket, incoming), else_=current + incoming)
+
+    def previous(current, prev):
+        return case(
+            (next_bucket, current),
+            (new_bucket, _ZERO),
+            else_=prev
+        )
+
+    return {
+        "updated_at": case(
+            (elapsed > _ZERO, excluded.updated_at),
+            else_=table.c.updated_at
+        ),
+        "half_life": excluded.half_life,
+        "decayed_reward": table.c.decayed_reward * decay + excluded.decayed_reward,
+        "decayed_count": table.c.decayed_count * decay + excluded.decayed_count,
+        "window_bucket": case(
+            (new_bucket, excluded.window_bucket),
+            else_=table.c.window_bucket
+        ),
+        "window_reward": rolled(table.c.window_reward, excluded.window_reward),
+        "window_count": rolled(table.c.window_count, excluded.window_count),
+        "prev_window_reward": previous(table.c.window_reward, table.c.prev_window_reward),
+        "prev_window_count": previous(table.c.window_count, table.c.prev_window_count),
+    }
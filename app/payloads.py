@@ -0,0 +1,125 @@
+import json
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+
+def encode_json(value: Any) -> bytes:
+    # Same settings as FastAPI's JSONResponse, so pre-encoded bodies are
+    # byte-identical to what the framework would have produced.
+    return json.dumps(
+        value,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+def freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class RoutePayload(NamedTuple):
+    route: Mapping[str, Any]
+    procedures: Tuple[Mapping[str, Any], ...]
+    evidence: Tuple[Mapping[str, Any], ...]
+    outcomes: Tuple[Mapping[str, Any], ...]
+    # '"chosen_route":...,"procedures":...,"evidence":...,"outcomes":...'
+    fragment: bytes
+
+
+def build_route_payload(
+    route: Dict[str, Any],
+    procedures: Dict[str, Dict[str, Any]],
+    evidence: Dict[str, Dict[str, Any]],
+    outcomes: Dict[str, Dict[str, Any]]
+) -> RoutePayload:
+    # Evidence is listed per procedure, then any kept for the route as a
+    # whole; sources without evidence or outcomes for a key omit it.
+    pids = route["procedure_ids"]
+    route_procedures = [procedures[pid] for pid in pids]
+    route_evidence = [evidence[key] for key in (*pids, route["route_id"]) if key in evidence]
+    route_outcomes = [outcomes[pid] for pid in pids if pid in outcomes]
+
+    fragment = b",".join([
+        b'"chosen_route":' + encode_json(route),
+        b'"procedures":' + encode_json(route_procedures),
+        b'"evidence":' + encode_json(route_evidence),
+        b'"outcomes":' + encode_json(route_outcomes),
+    ])
+
+    return RoutePayload(
+        freeze(route),
+        freeze(route_procedures),
+        freeze(route_evidence),
+        freeze(route_outcomes),
+        fragment
+    )
+
+
+class RoutePayloadTable:
+    """
+    route_id -> ready-to-serve RoutePayload.
+
+    rebuild() assembles a complete new table and publishes it with one
+    reference swap, so readers never see a partially built table.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._payloads: Dict[str, RoutePayload] = {}
+        self._route_ids: Dict[str, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+
+    def rebuild(
+        self,
+        routes_by_domain: Dict[str, List[Dict[str, Any]]],
+        procedures: Dict[str, Dict[str, Any]],
+        evidence: Dict[str, Dict[str, Any]],
+        outcomes: Dict[str, Dict[str, Any]]
+    ):
+        payloads = {
+            route["route_id"]: build_route_payload(
+                route, procedures, evidence, outcomes
+            )
+            for routes in routes_by_domain.values()
+            for route in routes
+        }
+        route_ids = {
+            domain_id: tuple(route["route_id"] for route in routes)
+            for domain_id, routes in routes_by_domain.items()
+        }
+        with self._lock:
+            self._payloads, self._route_ids = payloads, route_ids
+            self.version += 1
+
+    def get(self, route_id: str) -> Optional[RoutePayload]:
+        return self._payloads.get(route_id)
+
+    def route_ids(self, domain_id: str) -> Tuple[str, ...]:
+        return self._route_ids.get(domain_id, ())
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+
+def render_decision(
+    state_key: str,
+    jurisdiction: str,
+    domain_id: str,
+    payload: RoutePayload,
+    context_id: Optional[str] = None
+) -> bytes:
+    return b"".join([
+        b'{"state_key":', encode_json(state_key),
+        b',"jurisdiction":', encode_json(jurisdiction),
+        b',"domain_id":', encode_json(domain_id),
+        b",", payload.fragment,
+        b',"context_id":' + encode_json(context_id) if context_id is not None else b"",
+        b"}",
+    ])
@@ -0,0 +1,261 @@
+"""
+Checks data against the legal context JSON Schema (legal_context.json).
+
+Only the keywords that schema uses are supported: type, required,
+properties and items. compile_schema() turns a schema into a Validator
+once, as nested closures specialised to it, so checking a value does not
+walk the schema again. Valid data, the common case, costs one pass of
+those closures; only invalid data is walked a second time to describe
+the errors, as strings naming the JSON path of each offending value.
+"""
+import json
+import os
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+SCHEMA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "legal_context.json"
+)
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+}
+
+# Keywords that only annotate a schema and never fail a value.
+_ANNOTATIONS = {"$schema", "$id", "$comment", "title", "description", "examples", "default"}
+_SUPPORTED = {"type", "required", "properties", "items"} | _ANNOTATIONS
+
+# Dataset files whose values are checked at load time: the context
+# property each value must match, and whether a value is one item of it.
+DATASET_PARTS = {
+    "procedures.json": ("procedure", True),
+    "timelines.json": ("timeline", False),
+    "evidence.json": ("evidence", False),
+}
+
+Check = Callable[[Any], bool]
+
+# JSON scalars by schema type, matched on exact type: json.load only
+# produces these, and it keeps bool out of number without a second check.
+# Objects and arrays are matched with isinstance. Both the compiled checks
+# and schema_errors() follow these rules, so they agree on every value.
+_SCALARS = {
+    "string": frozenset({str}),
+    "number": frozenset({int, float}),
+    "integer": frozenset({int}),
+    "boolean": frozenset({bool}),
+    "null": frozenset({type(None)}),
+}
+
+
+@lru_cache(maxsize=None)
+def legal_context_schema() -> Dict[str, Any]:
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _is_type(value: Any, name: str) -> bool:
+    if name in ("object", "array"):
+        return isinstance(value, _TYPES[name])
+    return type(value) in _SCALARS[name]
+
+
+def schema_errors(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    errors: List[str] = []
+    expected = schema.get("type")
+    if expected is not None and not _is_type(value, expected):
+        errors.append(f"{path}: expected {expected}")
+        return errors
+
+    if isinstance(value, dict):
+        for key in schema.get("required", ()):
+            if key not in value:
+                errors.append(f"{path}: missing {key}")
+        for key, subschema in schema.get("properties", {}).items():
+            if key in value:
+                errors.extend(schema_errors(value[key], subschema, f"{path}.{key}"))
+    elif isinstance(value, list) and "items" in schema:
+        for i, item in enumerate(value):
+            errors.extend(schema_errors(item, schema["items"], f"{path}[{i}]"))
+    return errors
+
+
+# -------------------------
+# COMPILER
+# -------------------------
+
+class _Missing:
+    pass
+
+
+_MISSING = _Missing()
+
+
+def _type_check(name: str) -> Check:
+    if name in ("object", "array"):
+        types = _TYPES[name]
+        return lambda value: isinstance(value, types)
+    if name not in _SCALARS:
+        raise ValueError(f"Unsupported schema type: {name}")
+    scalars = _SCALARS[name]
+    return lambda value: type(value) in scalars
+
+
+def _scalar_types(schema: Dict[str, Any]) -> Optional[frozenset]:
+    """
+    The exact types schema allows, if it only constrains a scalar's type.
+    """
+    if schema.keys() - _ANNOTATIONS == {"type"} and schema["type"] in _SCALARS:
+        return _SCALARS[schema["type"]]
+    return None
+
+
+def _object_check(schema: Dict[str, Any], typed: bool) -> Optional[Check]:
+    required = frozenset(schema.get("required", ()))
+    # Scalar properties are checked inline, the rest through their own
+    # compiled checks.
+    scalars = []
+    nested = []
+    for key, subschema in schema.get("properties", {}).items():
+        types = _scalar_types(subschema)
+        if types is not None:
+            # An absent optional property passes as its own type.
+            scalars.append((key, types | {_Missing}))
+            continue
+        check = _compile(subschema)
+        if check is not None:
+            nested.append((key, check))
+    scalars = tuple(scalars)
+    nested = tuple(nested)
+    if not typed and not required and not scalars and not nested:
+        return None
+    # Without "type": "object" the keywords apply to objects only and any
+    # other value passes them.
+    otherwise = not typed
+
+    def check(value: Any) -> bool:
+        if not isinstance(value, dict):
+            return otherwise
+        if required and not required <= value.keys():
+            return False
+        for key, types in scalars:
+            if type(value.get(key, _MISSING)) not in types:
+                return False
+        for key, check_property in nested:
+            if key in value and not check_property(value[key]):
+                return False
+        return True
+
+    return check
+
+
+def _array_check(schema: Dict[str, Any], typed: bool) -> Optional[Check]:
+    items = _compile(schema["items"]) if "items" in schema else None
+    if items is None:
+        return _type_check("array") if typed else None
+    otherwise = not typed
+
+    types = _scalar_types(schema["items"])
+    if types is not None:
+        def check(value: Any) -> bool:
+            if not isinstance(value, list):
+                return otherwise
+            return all(type(item) in types for item in value)
+        return check
+
+    def check(value: Any) -> bool:
+        if not isinstance(value, list):
+            return otherwise
+        return all(map(items, value))
+
+    return check
+
+
+def _compile(schema: Dict[str, Any]) -> Optional[Check]:
+    """
+    One check for schema, or None if no value can fail it.
+    """
+    unsupported = schema.keys() - _SUPPORTED
+    if unsupported:
+        raise ValueError(f"Unsupported schema keywords: {', '.join(sorted(unsupported))}")
+
+    expected = schema.get("type")
+    if expected == "object":
+        return _object_check(schema, typed=True)
+    if expected == "array":
+        return _array_check(schema, typed=True)
+
+    checks = [
+        check
+        for check in (
+            _type_check(expected) if expected is not None else None,
+            _object_check(schema, typed=False),
+            _array_check(schema, typed=False),
+        )
+        if check is not None
+    ]
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    return lambda value: all(check(value) for check in checks)
+
+
+class Validator:
+    """
+    A schema compiled for repeated checks.
+    """
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+        self._check = _compile(schema) or (lambda value: True)
+
+    def is_valid(self, value: Any) -> bool:
+        return self._check(value)
+
+    def errors(self, value: Any, path: str = "$") -> List[str]:
+        if self._check(value):
+            return []
+        return schema_errors(value, self.schema, path)
+
+
+def compile_schema(schema: Dict[str, Any]) -> Validator:
+    """
+    Raises ValueError if the schema uses keywords this module does not
+    support, rather than silently ignoring them.
+    """
+    return Validator(schema)
+
+
+@lru_cache(maxsize=None)
+def legal_context_validator(part: Optional[str] = None, item: bool = False) -> Validator:
+    """
+    Validator for a whole legal context, or for one of its properties
+    (e.g. "timeline"); with item=True, for one element of an array
+    property.
+    """
+    schema = legal_context_schema()
+    if part is not None:
+        schema = schema["properties"][part]
+        if item:
+            schema = schema["items"]
+    return compile_schema(schema)
+
+
+def dataset_errors(filename: str, data: Mapping[str, Any]) -> Dict[str, List[str]]:
+    """
+    Check every value of a loaded dataset file against its part of the
+    context schema. Returns the errors by dataset key; files the schema
+    does not cover have none.
+    """
+    if filename not in DATASET_PARTS:
+        return {}
+    validator = legal_context_validator(*DATASET_PARTS[filename])
+    errors = {}
+    for key, value in data.items():
+        found = validator.errors(value)
+        if found:
+            errors[key] = found
+    return errors
@@ -0,0 +1,118 @@
+"""
+Compare the async decision/feedback handlers with the previous sync,
+threadpool-offloaded path on the same database.
+
+    python -m benchmarks.bench_async_vs_sync --concurrency 64 --requests 5000
+
+The score cache is disabled so every decision reaches the database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+
+def build_sync_app(main):
+    from fastapi import Depends, FastAPI, HTTPException
+
+    sync_app = FastAPI()
+
+    @sync_app.post("/api/v1/decision")
+    def make_decision(payload: main.DecisionRequest, db=Depends(main.get_db)):
+        state_key = main.build_state_key(
+            payload.jurisdiction,
+            payload.domain_id,
+            payload.user_type
+        )
+        routes = main.catalog.routes(payload.domain_id)
+        if not routes:
+            raise HTTPException(400, "No legal routes available")
+        chosen_route = main.select_best_route(db, state_key, payload.domain_id, routes)
+        return main.Response(
+            content=main.render_decision(
+                state_key,
+                payload.jurisdiction,
+                payload.domain_id,
+                main.catalog.payload(chosen_route["route_id"])
+            ),
+            media_type="application/json"
+        )
+
+    @sync_app.post("/api/v1/feedback")
+    def feedback(payload: main.FeedbackRequest, db=Depends(main.get_db)):
+        reward = main.calculate_reward(payload.vote, payload.time_spent, payload.follow_up)
+        main.update_memory(db, payload.state_key, payload.action_key, reward)
+        return {"status": "recorded", "reward": reward}
+
+    return sync_app
+
+
+def decision_body(i):
+    return {
+        "user_type": f"user_{i % 8}",
+        "jurisdiction": "IN",
+        "domain_id": "IN_RENT_EVICTION",
+        "case_summary": "Tenant has not paid rent for six months",
+    }
+
+
+def feedback_body(i):
+    return {
+        "state_key": f"in|in_rent_eviction|user_{i % 8}",
+        "action_key": "IN_EVICTION_NOTICE",
+        "vote": "up" if i % 3 else "down",
+        "time_spent": 90,
+        "follow_up": bool(i % 2),
+    }
+
+
+async def run(args):
+    from benchmarks.load_driver import run_load
+    import app.main as main
+
+    # The ASGI transport skips startup events.
+    await main.catalog.reload()
+    apps = {"sync": build_sync_app(main), "async": main.app}
+    results = {}
+    for name, app in apps.items():
+        for path, body in (
+            ("/api/v1/decision", decision_body),
+            ("/api/v1/feedback", feedback_body),
+        ):
+            result = await run_load(
+                app, "POST", path, body,
+                concurrency=args.concurrency,
+                requests=args.requests
+            )
+            results[f"{name} {path}"] = result
+            print(
+                f"{name:5} {path:20} {result['rps']:>9} req/s  "
+                f"p50 {result['p50_ms']:>8} ms  p99 {result['p99_ms']:>8} ms"
+            )
+
+    main.reward_aggregator.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="law-agent-bench-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{workdir}/bench.db")
+    os.environ["SCORE_CACHE_SIZE"] = "0"
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+HTTP load scenarios for the public endpoints, driven in-process.
+"""
+import asyncio
+import os
+import tempfile
+from typing import Any, Dict
+
+from benchmarks.bench_async_vs_sync import decision_body, feedback_body
+from benchmarks.load_driver import run_load
+
+
+async def _upload_load(app, pdf_path: str, concurrency: int, requests: int) -> Dict[str, Any]:
+    import time
+
+    import httpx
+
+    from benchmarks.load_driver import summarize
+
+    with open(pdf_path, "rb") as f:
+        data = f.read()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        latencies = []
+        errors = 0
+        counter = iter(range(requests))
+
+        async def worker():
+            nonlocal errors
+            for _ in counter:
+                start = time.perf_counter()
+                res = await client.post(
+                    "/api/v1/upload",
+                    files={"file": ("bench.pdf", data, "application/pdf")}
+                )
+                latencies.append(time.perf_counter() - start)
+                if res.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, errors, elapsed)
+    result.update({
+        "method": "POST",
+        "path": "/api/v1/upload",
+        "concurrency": concurrency,
+        "upload_bytes": len(data),
+    })
+    return result
+
+
+async def run_http(concurrency: int, requests: int, quick: bool = False) -> Dict[str, Any]:
+    import app.main as main
+    from benchmarks.micro import _synthetic_pdf
+
+    # The ASGI transport skips startup events.
+    await main.catalog.reload()
+
+    results = {
+        "decision": await run_load(
+            main.app, "POST", "/api/v1/decision", decision_body,
+            concurrency=concurrency, requests=requests
+        ),
+        "decision_batch_100": await run_load(
+            main.app, "POST", "/api/v1/decision/batch",
+            lambda i: [decision_body(i * 100 + j) for j in range(100)],
+            concurrency=max(1, concurrency // 4), requests=max(10, requests // 50)
+        ),
+        "feedback": await run_load(
+            main.app, "POST", "/api/v1/feedback", feedback_body,
+            concurrency=concurrency, requests=requests
+        ),
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        pdf_path = os.path.join(workdir, "upload.pdf")
+        _synthetic_pdf(pdf_path, 20 if quick else 100)
+        results["upload"] = await _upload_load(
+            main.app, pdf_path,
+            concurrency=max(1, concurrency // 8),
+            requests=max(5, requests // 100)
+        )
+
+    main.reward_aggregator.flush()
+    return results
@@ -0,0 +1,76 @@
+"""
+In-process HTTP load driver.
+
+Requests go through httpx's ASGI transport straight into the app, so the
+numbers measure the application (routing, validation, handlers, DB) and
+not the network stack.
+"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    ms = 1000.0
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * ms, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * ms, 3),
+        "p90_ms": round(percentile(latencies, 90) * ms, 3),
+        "p99_ms": round(percentile(latencies, 99) * ms, 3),
+        "max_ms": round(latencies[-1] * ms, 3) if latencies else 0.0,
+    }
+
+
+async def run_load(
+    app,
+    method: str,
+    path: str,
+    json_body: Optional[Callable[[int], Any]] = None,
+    concurrency: int = 32,
+    requests: int = 2000,
+    warmup: int = 50
+) -> Dict[str, Any]:
+    """
+    Fire `requests` calls at `app` from `concurrency` workers and return
+    throughput and latency percentiles. json_body(i) builds the i-th body.
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(warmup):
+            await client.request(method, path, json=json_body(i) if json_body else None)
+
+        latencies: List[float] = []
+        errors = 0
+        counter = iter(range(requests))
+
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                body = json_body(i) if json_body else None
+                start = time.perf_counter()
+                res = await client.request(method, path, json=body)
+                latencies.append(time.perf_counter() - start)
+                if res.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, errors, elapsed)
+    result.update({"method": method, "path": path, "concurrency": concurrency})
+    return result
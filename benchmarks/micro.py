@@ -0,0 +1,319 @@
+"""
+Micro-benchmarks for the decision engine hot paths.
+
+Each bench_* function returns a JSON-serialisable dict of measurements.
+They are registered in BENCHMARKS and driven by benchmarks.run.
+"""
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Any, Callable, Dict
+
+STATES_ROUTES = 5
+
+
+def measure(fn: Callable[[], Any], number: int = 100, repeat: int = 5) -> Dict[str, float]:
+    """
+    Call fn `number` times per round for `repeat` rounds and report the
+    per-call time of the best and median round in microseconds.
+    """
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - start) / number)
+    return {
+        "calls": number * repeat,
+        "best_us": round(min(rounds) * 1e6, 3),
+        "median_us": round(statistics.median(rounds) * 1e6, 3),
+    }
+
+
+# -------------------------
+# RL MEMORY
+# -------------------------
+
+def _seed_memory(engine, rows: int):
+    from app.memory.models import AgentMemory
+
+    states = max(1, rows // STATES_ROUTES)
+    with engine.begin() as conn:
+        conn.execute(AgentMemory.__table__.delete())
+        batch = []
+        for i in range(rows):
+            total = float(i % 7) - 3.0
+            batch.append({
+                "state_key": f"in|in_rent_eviction|user_{i % states}",
+                "action_key": f"ROUTE_{i // states}",
+                "total_reward": total,
+                "times_used": 1 + i % 11,
+                "avg_reward": total / (1 + i % 11),
+            })
+            if len(batch) == 50000:
+                conn.execute(AgentMemory.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(AgentMemory.__table__.insert(), batch)
+
+
+def bench_select_best_route(quick: bool = False) -> Dict[str, Any]:
+    from sqlalchemy.orm import sessionmaker
+
+    import app.main as main
+    from app.catalog import StaticCatalogBackend, build_catalog
+    from app.db.migrations import upgrade
+    from app.db.session import create_db_engine
+
+    sizes = [10, 1000, 100000] if quick else [10, 1000, 100000, 1000000]
+    routes = [
+        {"route_id": f"ROUTE_{i}", "procedure_ids": []}
+        for i in range(STATES_ROUTES)
+    ]
+    previous = main.catalog.swap(build_catalog(
+        [("bench", StaticCatalogBackend({"BENCH_DOMAIN": routes}).source)],
+        version=0
+    ))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_db_engine(f"sqlite:///{workdir}/memory.db")
+        upgrade(engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+
+        for rows in sizes:
+            _seed_memory(engine, rows)
+            state_key = "in|in_rent_eviction|user_0"
+            db = Session()
+
+            def uncached():
+                main.score_cache.clear()
+                main.select_best_route(db, state_key, "BENCH_DOMAIN", routes)
+
+            def cached():
+                main.select_best_route(db, state_key, "BENCH_DOMAIN", routes)
+
+            results[str(rows)] = {
+                "db": measure(uncached, number=200),
+                "cached": measure(cached, number=2000),
+            }
+            db.close()
+        engine.dispose()
+
+    main.score_cache.clear()
+    main.catalog.swap(previous)
+    return {"rows": results}
+
+
+def bench_reward(quick: bool = False) -> Dict[str, Any]:
+    from sqlalchemy.orm import sessionmaker
+
+    import app.main as main
+    from app.db.migrations import upgrade
+    from app.db.session import create_db_engine
+
+    results = {
+        "calculate_reward": measure(
+            lambda: main.calculate_reward("up", 90, True),
+            number=100000
+        )
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_db_engine(f"sqlite:///{workdir}/memory.db")
+        upgrade(engine)
+        db = sessionmaker(bind=engine, autoflush=False)()
+        counter = iter(range(10 ** 9))
+
+        def update():
+            i = next(counter)
+            main.update_memory(db, f"state_{i % 50}", f"ROUTE_{i % 5}", 1.0)
+
+        results["update_memory"] = measure(update, number=100 if quick else 500)
+        db.close()
+        engine.dispose()
+
+    return results
+
+
+# -------------------------
+# DOCUMENTS
+# -------------------------
+
+def _synthetic_pdf(path: str, pages: int):
+    import fitz
+
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text(
+            (72, 72),
+            f"Page {i}: notice dated 12/0{i % 9 + 1}/2021 under Section 106 "
+            f"for arrears of Rs {1000 + i}. The landlord and the tenant agree.",
+        )
+    doc.save(path)
+    doc.close()
+
+
+def bench_pdf(quick: bool = False) -> Dict[str, Any]:
+    from app.documents.parser import (
+        extract_text_from_path,
+        extract_text_from_pdf,
+        shutdown_pool,
+    )
+
+    page_counts = [1, 10, 100] if quick else [1, 10, 100, 500]
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for pages in page_counts:
+            path = os.path.join(workdir, f"doc_{pages}.pdf")
+            _synthetic_pdf(path, pages)
+            with open(path, "rb") as f:
+                data = f.read()
+            number = max(1, 200 // pages)
+            results[str(pages)] = {
+                "bytes": len(data),
+                "extract_text_from_pdf": measure(
+                    lambda: extract_text_from_pdf(data), number=number, repeat=3
+                ),
+                "extract_text_from_path": measure(
+                    lambda: extract_text_from_path(path), number=number, repeat=3
+                ),
+            }
+    shutdown_pool()
+    return {"pages": results}
+
+
+def _synthetic_text(size: int) -> str:
+    line = (
+        "The tenant occupies the premises and the rent is due on the first "
+        "of each month as per the agreement between the parties.\n"
+    )
+    body = line * (size // len(line))
+    # Facts sit at the end so the scan has to cover the whole text.
+    return body + "Notice of 01/02/2023 for ₹ 45,000 served by the landlord under Section 106."
+
+
+def bench_facts(quick: bool = False) -> Dict[str, Any]:
+    from app.documents.extractor import extract_legal_facts
+
+    sizes = [1 << 20] if quick else [1 << 20, 4 << 20]
+    results = {}
+    for size in sizes:
+        text = _synthetic_text(size)
+        results[str(size)] = measure(lambda: extract_legal_facts(text), number=3, repeat=3)
+    return {"bytes": results}
+
+
+# -------------------------
+# NYAYA DATASETS
+# -------------------------
+
+def _write_dataset(root: str, country: str, domains: int, routes_per_domain: int):
+    os.makedirs(os.path.join(root, country), exist_ok=True)
+    data = {name: {} for name in (
+        "domains", "routes", "procedures", "timelines", "evidence", "glossary"
+    )}
+    for d in range(domains):
+        domain_id = f"{country}_DOMAIN_{d}"
+        data["domains"][domain_id] = {"domain_id": domain_id, "name": f"Domain {d}"}
+        data["glossary"][domain_id] = {"Notice": "A formal communication"}
+        routes = []
+        for r in range(routes_per_domain):
+            route_id = f"{domain_id}_ROUTE_{r}"
+            procedure_ids = [f"{route_id}_P{p}" for p in range(3)]
+            routes.append({"route_id": route_id, "procedure_ids": procedure_ids})
+            for step, pid in enumerate(procedure_ids, 1):
+                data["procedures"][pid] = {
+                    "procedure_id": pid,
+                    "steps": [{
+                        "step": step,
+                        "action": f"Action {step}",
+                        "statute": f"Act {step}, Section {100 + step}",
+                        "min_days": 10,
+                        "max_days": 30,
+                    }],
+                }
+            data["timelines"][route_id] = [
+                {"phase": "Notice", "min_days": 10, "max_days": 30}
+            ]
+            data["evidence"][route_id] = [
+                {"required_documents": ["Agreement"], "optional_documents": []}
+            ]
+        data["routes"][domain_id] = routes
+
+    for name, content in data.items():
+        with open(os.path.join(root, country, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(content, f, indent=2)
+
+
+def bench_nyaya(quick: bool = False) -> Dict[str, Any]:
+    import legal_context_api
+    import nyaya_loader
+    import nyaya_snapshot
+    from app.schema import dataset_errors
+
+    store = nyaya_loader.get_store()
+    original_dir = nyaya_loader.DATA_DIR
+    original_snapshot = nyaya_loader.SNAPSHOT_PATH
+    original_hooks = (store.validator, store.timer)
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        _write_dataset(root, "IN", domains=20 if quick else 200, routes_per_domain=5)
+        nyaya_loader.DATA_DIR = root
+        nyaya_loader.SNAPSHOT_PATH = ""
+        # Validate as the application does.
+        store.configure(validator=dataset_errors)
+        store.clear()
+        try:
+            results["preload"] = measure(
+                lambda: (store.clear(), store.preload()),
+                number=1,
+                repeat=3
+            )
+            results["get_procedure"] = measure(
+                lambda: nyaya_loader.get_procedure("IN", "IN_DOMAIN_3_ROUTE_2_P1"),
+                number=20000
+            )
+            results["get_routes"] = measure(
+                lambda: nyaya_loader.get_routes("IN", "IN_DOMAIN_3"),
+                number=20000
+            )
+            results["get_legal_context"] = measure(
+                lambda: legal_context_api.get_legal_context(
+                    "IN", "IN_DOMAIN_3", "IN_DOMAIN_3_ROUTE_2"
+                ),
+                number=5000
+            )
+
+            snapshot_path = os.path.join(root, nyaya_loader.SNAPSHOT_FILENAME)
+            results["snapshot_bytes"] = nyaya_snapshot.build_snapshot(
+                root, snapshot_path, nyaya_loader.DATASET_FILES, dataset_errors
+            )["bytes"]
+            nyaya_loader.SNAPSHOT_PATH = snapshot_path
+            results["preload_snapshot"] = measure(
+                lambda: (store.clear(), store.preload()),
+                number=1,
+                repeat=3
+            )
+            results["get_procedure_snapshot"] = measure(
+                lambda: nyaya_loader.get_procedure("IN", "IN_DOMAIN_3_ROUTE_2_P1"),
+                number=20000
+            )
+        finally:
+            nyaya_loader.DATA_DIR = original_dir
+            nyaya_loader.SNAPSHOT_PATH = original_snapshot
+            store.configure(*original_hooks)
+            store.clear()
+    return results
+
+
+BENCHMARKS = {
+    "select_best_route": bench_select_best_route,
+    "reward": bench_reward,
+    "pdf": bench_pdf,
+    "facts": bench_facts,
+    "nyaya": bench_nyaya,
+}
@@ -0,0 +1,112 @@
+"""
+Run the benchmark suite and write JSON results.
+
+    python -m benchmarks.run                      # everything
+    python -m benchmarks.run --quick --only facts pdf
+    python -m benchmarks.run --compare benchmarks/results/<old>.json
+
+Results go to benchmarks/results/<commit>.json unless --output is given,
+so runs on two commits can be compared with --compare.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _flatten(value, prefix=""):
+    if isinstance(value, dict):
+        for key, inner in value.items():
+            yield from _flatten(inner, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+
+
+def compare(old: dict, new: dict):
+    """
+    Print metrics present in both runs with their relative change.
+    Only timing and throughput fields are shown.
+    """
+    old_flat = dict(_flatten(old.get("results", {})))
+    for key, value in _flatten(new.get("results", {})):
+        if not key.endswith(("_us", "_ms", "rps")) or key not in old_flat:
+            continue
+        before = old_flat[key]
+        change = (value - before) / before * 100 if before else 0.0
+        print(f"{key:70} {before:>12} -> {value:>12}  ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--only", nargs="*", help="micro-benchmarks and/or 'http' to run")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--output", help="result file (default: results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to diff against")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="law-agent-bench-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{workdir}/bench.db")
+
+    from benchmarks.load import run_http
+    from benchmarks.micro import BENCHMARKS
+
+    selected = args.only or [*BENCHMARKS, "http"]
+    unknown = set(selected) - set(BENCHMARKS) - {"http"}
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = {}
+    for name in selected:
+        started = time.perf_counter()
+        if name == "http":
+            results[name] = asyncio.run(
+                run_http(args.concurrency, args.requests, quick=args.quick)
+            )
+        else:
+            results[name] = BENCHMARKS[name](quick=args.quick)
+        print(f"{name}: done in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": results,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
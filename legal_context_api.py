@@ -1,30 +1,63 @@
-from typing import Optional, Dict, Any, List
+import logging
+import os
+import random
+import threading
+from typing import Optional, Dict, Any, List, Iterable, Tuple
 
+from app.metrics import registry
+from app.schema import legal_context_validator
 from nyaya_loader import (
     get_domain,
     get_routes,
     get_procedure,
     get_timeline,
     get_evidence,
-    get_glossary,
+    get_store,
 )
 
+# Files a legal context is assembled from. A change to any of them for a
+# country invalidates that country's compiled contexts, and only those.
+CONTEXT_FILES = (
+    "domains.json",
+    "routes.json",
+    "procedures.json",
+    "timelines.json",
+    "evidence.json",
+)
 
-def get_legal_context(
+# Fraction of returned contexts checked against legal_context.json again
+# on the way out. Every context is already checked once when it is
+# compiled; sampling also catches a shared context mutated after that.
+CONTEXT_SAMPLE_RATE = float(os.getenv("LEGAL_CONTEXT_VALIDATION_SAMPLE_RATE", "0"))
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_VALIDATIONS = registry.counter(
+    "law_agent_legal_context_validations_total",
+    "Legal contexts checked against the schema by stage (compile, sample) and result."
+)
+
+ContextKey = Tuple[str, str, str]
+
+# (country, domain_id, route_id) -> (source file versions, context)
+_compiled: Dict[ContextKey, Tuple[Tuple[int, ...], Dict[str, Any]]] = {}
+_compiled_lock = threading.Lock()
+
+
+def context_version(country: str) -> Tuple[int, ...]:
+    """
+    Version of the files a country's contexts are built from. It changes
+    whenever any of them is reloaded.
+    """
+    store = get_store()
+    return tuple(store.file_version(country, f) for f in CONTEXT_FILES)
+
+
+def _assemble_legal_context(
     country: str,
     domain_id: str,
     route_id: str
 ) -> Optional[Dict[str, Any]]:
-    """
-    Assemble a legal context object strictly from Nyaya datasets.
-
-    Rules:
-    - No inference
-    - No fallback
-    - No defaults
-    - If any required data is missing → return None
-    """
-
     # 1. Domain
     domain = get_domain(country, domain_id)
     if domain is None:
@@ -41,7 +74,7 @@ def get_legal_context(
 
     # 3. Procedures
     procedures: List[Dict[str, Any]] = []
-    statutes = set()
+    statutes: Dict[str, None] = {}
 
     for pid in route.get("procedure_ids", []):
         procedure = get_procedure(country, pid)
@@ -53,7 +86,7 @@ def get_legal_context(
         for step in procedure.get("steps", []):
             statute = step.get("statute")
             if statute:
-                statutes.add(statute)
+                statutes[statute] = None
 
     # 4. Timeline
     timeline = get_timeline(country, route_id)
@@ -75,3 +108,108 @@ def get_legal_context(
         "evidence": evidence,
         "statutes": list(statutes),
     }
+
+
+def _validate_context(key: ContextKey, context: Dict[str, Any], stage: str):
+    errors = legal_context_validator().errors(context)
+    if errors:
+        logger.warning(
+            "Legal context %s failed %s validation (%d errors): %s",
+            "/".join(key), stage, len(errors), "; ".join(errors[:5])
+        )
+    CONTEXT_VALIDATIONS.inc(stage=stage, result="invalid" if errors else "valid")
+
+
+def _sampled(key: ContextKey, context: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if context is not None and CONTEXT_SAMPLE_RATE > 0 and random.random() < CONTEXT_SAMPLE_RATE:
+        _validate_context(key, context, "sample")
+    return context
+
+
+def _compiled_context(
+    key: ContextKey,
+    versions: Tuple[int, ...]
+) -> Optional[Dict[str, Any]]:
+    cached = _compiled.get(key)
+    if cached is not None and cached[0] == versions:
+        return cached[1]
+
+    context = _assemble_legal_context(*key)
+    # Only valid triples are memoized, so arbitrary ids from callers
+    # cannot grow the cache.
+    if context is not None:
+        _validate_context(key, context, "compile")
+        with _compiled_lock:
+            _compiled[key] = (versions, context)
+    return context
+
+
+def get_legal_context(
+    country: str,
+    domain_id: str,
+    route_id: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Assemble a legal context object strictly from Nyaya datasets.
+
+    Rules:
+    - No inference
+    - No fallback
+    - No defaults
+    - If any required data is missing → return None
+
+    Contexts are compiled once per dataset version and shared between
+    callers; treat the returned dict as read-only.
+    """
+    key = (country, domain_id, route_id)
+    return _sampled(key, _compiled_context(key, context_version(country)))
+
+
+def get_legal_contexts(
+    requests: Iterable[ContextKey]
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Bulk form of get_legal_context for (country, domain_id, route_id)
+    triples, in request order. Dataset versions are checked once per
+    country rather than once per triple.
+    """
+    versions: Dict[str, Tuple[int, ...]] = {}
+    results = []
+    for country, domain_id, route_id in requests:
+        if country not in versions:
+            versions[country] = context_version(country)
+        key = (country, domain_id, route_id)
+        results.append(_sampled(key, _compiled_context(key, versions[country])))
+    return results
+
+
+def get_domain_contexts(
+    country: str,
+    domain_id: str
+) -> Optional[Dict[str, Optional[Dict[str, Any]]]]:
+    """
+    Legal contexts for every route of a domain, keyed by route_id.
+    Returns None if the domain has no routes.
+    """
+    routes = get_routes(country, domain_id)
+    if routes is None:
+        return None
+
+    route_ids = [r.get("route_id") for r in routes if r.get("route_id")]
+    contexts = get_legal_contexts(
+        (country, domain_id, route_id) for route_id in route_ids
+    )
+    return dict(zip(route_ids, contexts))
+
+
+def warm_legal_contexts(countries: Optional[Iterable[str]] = None) -> int:
+    """
+    Compile every valid context up front. Returns the number compiled.
+    """
+    compiled = 0
+    for country in countries or get_store().countries():
+        domains = get_store().get_file(country, "routes.json") or {}
+        for domain_id in domains:
+            contexts = get_domain_contexts(country, domain_id) or {}
+            compiled += sum(1 for c in contexts.values() if c is not None)
+    return compiled
@@ -1,13 +1,35 @@
-from fastapi import FastAPI, Query
+from typing import Any, Callable
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+
+from app.http_cache import ResponseCache
 
 app = FastAPI(title="Nyaya Legal Knowledge API (Stub)")
 
+# -----------------------------
+# RESPONSE CACHE
+# -----------------------------
+# The stub data only changes with the code, so one version covers the
+# process lifetime; ETags follow the body itself.
+DATASET_VERSION = 1
+
+response_cache = ResponseCache()
+
+
+def _respond(request: Request, build: Callable[[], Any]) -> Response:
+    key = (request.url.path, request.url.query)
+    response = response_cache.response(request, key, DATASET_VERSION, build)
+    if response is None:
+        raise HTTPException(404, "Not found")
+    return response
+
+
 # -----------------------------
 # DOMAIN ONTOLOGY
 # -----------------------------
 @app.get("/lka/domains")
-def list_domains():
-    return [
+def list_domains(request: Request):
+    return _respond(request, lambda: [
         {
             "domain_id": "IN_RENT_EVICTION",
             "country": "IN",
@@ -18,12 +40,12 @@ def list_domains():
             ],
             "parent_domain": "IN_PROPERTY"
         }
-    ]
+    ])
 
 
 @app.get("/lka/domains/{domain_id}")
-def get_domain(domain_id: str):
-    return {
+def get_domain(request: Request, domain_id: str):
+    return _respond(request, lambda: {
         "domain_id": domain_id,
         "country": "IN",
         "name": "Tenant Eviction",
@@ -32,15 +54,15 @@ def get_domain(domain_id: str):
             "Rent Control Act"
         ],
         "parent_domain": "IN_PROPERTY"
-    }
+    })
 
 
 # -----------------------------
 # LEGAL ROUTES
 # -----------------------------
 @app.get("/lka/routes")
-def get_routes(domain: str = Query(...)):
-    return [
+def get_routes(request: Request, domain: str = Query(...)):
+    return _respond(request, lambda: [
         {
             "route_id": "IN_EVICTION_NOTICE",
             "domain_id": domain,
@@ -51,12 +73,12 @@ def get_routes(domain: str = Query(...)):
                 "IN_EVICT_HEARING"
             ]
         }
-    ]
+    ])
 
 
 @app.get("/lka/routes/{route_id}")
-def get_route(route_id: str):
-    return {
+def get_route(request: Request, route_id: str):
+    return _respond(request, lambda: {
         "route_id": route_id,
         "domain_id": "IN_RENT_EVICTION",
         "route_name": "Legal Eviction via Notice",
@@ -65,15 +87,15 @@ def get_route(route_id: str):
             "IN_EVICT_FILE",
             "IN_EVICT_HEARING"
         ]
-    }
+    })
 
 
 # -----------------------------
 # PROCEDURES
 # -----------------------------
 @app.get("/lka/procedure/{procedure_id}")
-def get_procedure(procedure_id: str):
-    return {
+def get_procedure(request: Request, procedure_id: str):
+    return _respond(request, lambda: {
         "procedure_id": procedure_id,
         "steps": [
             {
@@ -89,30 +111,30 @@ def get_procedure(procedure_id: str):
             "INVALID_NOTICE"
         ],
         "appeal_available": True
-    }
+    })
 
 
 # -----------------------------
 # GLOSSARY
 # -----------------------------
 @app.get("/lka/glossary/{term}")
-def glossary(term: str):
-    return {
+def glossary(request: Request, term: str):
+    return _respond(request, lambda: {
         "term": term,
         "definition": "Removal of a tenant through lawful court process",
         "statutes": [
             "Transfer of Property Act"
         ],
         "jurisdiction": ["IN"]
-    }
+    })
 
 
 # -----------------------------
 # EVIDENCE REQUIREMENTS
 # -----------------------------
 @app.get("/lka/evidence/{procedure_id}")
-def evidence(procedure_id: str):
-    return {
+def evidence(request: Request, procedure_id: str):
+    return _respond(request, lambda: {
         "procedure_id": procedure_id,
         "required_documents": [
             "Rent Agreement",
@@ -122,17 +144,17 @@ def evidence(procedure_id: str):
         "optional_documents": [
             "Witness affidavit"
         ]
-    }
+    })
 
 
 # -----------------------------
 # OUTCOME PROBABILITIES
 # -----------------------------
 @app.get("/lka/outcomes/{procedure_id}")
-def outcomes(procedure_id: str):
-    return {
+def outcomes(request: Request, procedure_id: str):
+    return _respond(request, lambda: {
         "procedure_id": procedure_id,
         "success_range": [0.55, 0.75],
         "escalation_risk": 0.2,
         "wrong_route_penalty": 0.4
-    }
+    })
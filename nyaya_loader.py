@@ -1,69 +1,378 @@
 import json
+import logging
 import os
-from typing import Optional, Dict, Any, List
+import threading
+import time
+from typing import Optional, Dict, Any, Callable, ContextManager, List, Mapping, Tuple
+
+from nyaya_snapshot import Snapshot, SnapshotError, open_snapshot
+
+logger = logging.getLogger(__name__)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "nyaya_data")
 
+DATASET_FILES = (
+    "domains.json",
+    "routes.json",
+    "procedures.json",
+    "timelines.json",
+    "evidence.json",
+    "glossary.json",
+)
+
+# Seconds between mtime checks for a loaded file. Lookups inside this
+# window are served straight from memory without touching the disk.
+RELOAD_CHECK_INTERVAL = float(os.getenv("NYAYA_RELOAD_CHECK_INTERVAL", "2.0"))
+
+# Compiled snapshot built by `python -m nyaya_snapshot`. Files it contains
+# are served from it; anything missing falls back to the JSON directory.
+# Defaults to <DATA_DIR>/nyaya.snapshot; set NYAYA_SNAPSHOT="" to disable.
+SNAPSHOT_FILENAME = "nyaya.snapshot"
+SNAPSHOT_PATH = os.getenv("NYAYA_SNAPSHOT")
+
+
+class DatasetLoadError(Exception):
+    """
+    A dataset file exists but cannot be read or parsed, e.g. because it is
+    being rewritten.
+    """
+
 
 # -------------------------
 # INTERNAL HELPERS
 # -------------------------
 
 def _load_json(country: str, filename: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse a dataset file. Missing and zero-byte (placeholder) files are
+    None; unreadable or invalid JSON raises DatasetLoadError.
+    """
     path = os.path.join(DATA_DIR, country, filename)
 
-    if not os.path.exists(path):
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return None
+    except OSError as exc:
+        raise DatasetLoadError(f"{country}/{filename}: {exc}") from exc
+
+    if not raw:
         return None
+    try:
+        return json.loads(raw.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise DatasetLoadError(f"{country}/{filename}: {exc}") from exc
+
 
+def _file_mtime(country: str, filename: str) -> Optional[float]:
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
+        return os.stat(os.path.join(DATA_DIR, country, filename)).st_mtime
+    except OSError:
         return None
 
 
+def _is_country_name(country: str) -> bool:
+    # Country names come from request paths; only a plain directory name
+    # may be joined onto DATA_DIR.
+    return bool(country) and country not in (".", "..") and not any(
+        sep in country for sep in (os.sep, os.altsep) if sep
+    )
+
+
+def _snapshot_path() -> Optional[str]:
+    if SNAPSHOT_PATH is not None:
+        return SNAPSHOT_PATH or None
+    return os.path.join(DATA_DIR, SNAPSHOT_FILENAME)
+
+
+# -------------------------
+# IN-MEMORY DATASET STORE
+# -------------------------
+
+# Checks a loaded file, e.g. against the legal context schema; returns the
+# offending entries by dataset key with their errors.
+Validator = Callable[[str, Mapping[str, Any]], Dict[str, List[str]]]
+# Context manager factory timing one lookup, given its span name.
+Timer = Callable[[str], ContextManager[Any]]
+
+# Entry for a file of a country that does not exist. It is never stored.
+_ABSENT: Tuple[Any, Optional[Mapping[str, Any]], float, int] = (None, None, float("-inf"), 0)
+
+
+class NyayaStore:
+    """
+    Process-local store of every Nyaya dataset file.
+
+    Files are parsed once and indexed by (country, filename); lookups by
+    key are plain dictionary reads. A file is re-parsed only when its
+    mtime changes, checked at most once per RELOAD_CHECK_INTERVAL.
+
+    When a snapshot is present, files it contains are served from it
+    instead: records are decoded lazily on first lookup, and replacing the
+    snapshot file is picked up on the same check interval.
+
+    The application supplies the schema validator and the lookup timer
+    (see configure()); without them files are served unchecked and
+    lookups are not timed.
+    """
+
+    def __init__(
+        self,
+        check_interval: float = RELOAD_CHECK_INTERVAL,
+        validator: Optional[Validator] = None,
+        timer: Optional[Timer] = None
+    ):
+        self.check_interval = check_interval
+        self.validator = validator
+        self.timer = timer
+        # (country, filename) -> (source stamp, data, last_checked, version)
+        self._files: Dict[Tuple[str, str], Tuple[Any, Optional[Mapping[str, Any]], float, int]] = {}
+        # (country, filename) -> why its latest contents could not be loaded
+        self._errors: Dict[Tuple[str, str], str] = {}
+        self._invalid: Dict[Tuple[str, str], Dict[str, List[str]]] = {}
+        self._lock = threading.Lock()
+        self._version = 0
+
+        self._snapshot: Optional[Snapshot] = None
+        self._snapshot_stamp: Any = None
+        self._snapshot_checked = float("-inf")
+
+    def configure(self, validator: Optional[Validator] = None, timer: Optional[Timer] = None) -> None:
+        """
+        Set the validator and timer. Files already loaded are validated on
+        their next reload; call before preload() to cover every file.
+        """
+        self.validator = validator
+        self.timer = timer
+
+    def countries(self) -> List[str]:
+        names = set()
+        snapshot = self.snapshot()
+        if snapshot is not None:
+            names.update(snapshot.countries())
+        if os.path.isdir(DATA_DIR):
+            names.update(
+                name for name in os.listdir(DATA_DIR)
+                if os.path.isdir(os.path.join(DATA_DIR, name))
+            )
+        return sorted(names)
+
+    def snapshot(self) -> Optional[Snapshot]:
+        """
+        The active snapshot, reopened if the file was replaced since the
+        last check.
+        """
+        now = time.monotonic()
+        if now - self._snapshot_checked < self.check_interval:
+            return self._snapshot
+
+        with self._lock:
+            return self._check_snapshot(now)
+
+    def _check_snapshot(self, now: float) -> Optional[Snapshot]:
+        if now - self._snapshot_checked < self.check_interval:
+            return self._snapshot
+        self._snapshot_checked = now
+
+        path = _snapshot_path()
+        try:
+            st = os.stat(path) if path else None
+        except OSError:
+            st = None
+        stamp = (path, st.st_mtime_ns, st.st_size) if st else None
+        if stamp == self._snapshot_stamp:
+            return self._snapshot
+
+        self._snapshot_stamp = stamp
+        self._snapshot = None
+        if stamp is not None:
+            try:
+                # Mappings handed out from a replaced snapshot keep their
+                # own reference to its memory map.
+                self._snapshot = open_snapshot(path)
+            except (OSError, ValueError, KeyError, SnapshotError) as exc:
+                logger.warning("Ignoring Nyaya snapshot %s: %s", path, exc)
+        return self._snapshot
+
+    def preload(self) -> None:
+        """
+        Load every dataset file now, re-checking the snapshot and each
+        file's mtime regardless of the check interval.
+        """
+        with self._lock:
+            self._snapshot_checked = float("-inf")
+        for country in self.countries():
+            for filename in DATASET_FILES:
+                self._refresh(country, filename)
+
+    def _refresh(self, country: str, filename: str):
+        # Only the checks and the swap hold the lock. Stat, parse and schema
+        # validation run outside it, so reloading a large file does not
+        # block lookups of other files.
+        if not _is_country_name(country):
+            return _ABSENT
+        key = (country, filename)
+        with self._lock:
+            snapshot = self._check_snapshot(time.monotonic())
+            snapshot_stamp = self._snapshot_stamp
+        if snapshot is not None and snapshot.has(country, filename):
+            stamp = ("snapshot", snapshot_stamp, snapshot.dataset_version)
+        else:
+            snapshot = None
+            stamp = _file_mtime(country, filename)
+
+        entry = self._files.get(key)
+        if entry is not None and entry[0] == stamp:
+            with self._lock:
+                entry = self._files[key] = (stamp, entry[1], time.monotonic(), entry[3])
+            return entry
+
+        # Lookups for countries that do not exist are answered without
+        # being remembered, so arbitrary ids cannot grow the store.
+        if entry is None and stamp is None and not os.path.isdir(os.path.join(DATA_DIR, country)):
+            return _ABSENT
+
+        error = None
+        invalid: Dict[str, List[str]] = {}
+        if snapshot is not None:
+            # Snapshots are validated when they are built.
+            data = snapshot.file(country, filename)
+        else:
+            try:
+                data = _load_json(country, filename) if stamp is not None else None
+            except DatasetLoadError as exc:
+                error = str(exc)
+                data = None
+            if not isinstance(data, dict):
+                data = None
+            if data and self.validator is not None:
+                invalid = self.validator(filename, data)
+
+        with self._lock:
+            now = time.monotonic()
+            current = self._files.get(key)
+            # Another thread loaded the file meanwhile; keep its result.
+            if current is not None and current[3] != (entry[3] if entry is not None else None):
+                return current
+
+            if error is not None:
+                # Keep serving the last good contents and retry on the next
+                # check; a file caught mid-write parses then.
+                self._errors[key] = error
+                entry = (
+                    current[0] if current is not None else None,
+                    current[1] if current is not None else None,
+                    now,
+                    current[3] if current is not None else 0
+                )
+                self._files[key] = entry
+            else:
+                self._errors.pop(key, None)
+                if invalid:
+                    self._invalid[key] = invalid
+                else:
+                    self._invalid.pop(key, None)
+                self._version += 1
+                entry = self._files[key] = (stamp, data, now, self._version)
+
+        if error is not None:
+            logger.warning("Keeping previous %s/%s: %s", country, filename, error)
+        elif invalid:
+            logger.warning(
+                "%s/%s: %d entries do not match the legal context schema: %s",
+                country, filename, len(invalid), ", ".join(list(invalid)[:10])
+            )
+        return entry
+
+    def _entry(self, country: str, filename: str):
+        entry = self._files.get((country, filename))
+        if entry is not None and time.monotonic() - entry[2] < self.check_interval:
+            return entry
+        return self._refresh(country, filename)
+
+    def get_file(self, country: str, filename: str) -> Optional[Mapping[str, Any]]:
+        return self._entry(country, filename)[1]
+
+    def file_version(self, country: str, filename: str) -> int:
+        """
+        Number that changes whenever the file is (re)loaded. Callers can key
+        derived data on it to know when to rebuild.
+        """
+        return self._entry(country, filename)[3]
+
+    def load_errors(self) -> Dict[Tuple[str, str], str]:
+        """
+        Files whose current contents failed to load, with the reason. Their
+        previous contents are still being served.
+        """
+        with self._lock:
+            return dict(self._errors)
+
+    def validation_errors(self) -> Dict[Tuple[str, str], Dict[str, List[str]]]:
+        """
+        Entries of loaded files that do not match the legal context schema,
+        by file and then dataset key. They are served regardless.
+        """
+        with self._lock:
+            return dict(self._invalid)
+
+    def get(self, country: str, filename: str, key: str) -> Any:
+        data = self.get_file(country, filename)
+        if data is None:
+            return None
+        return data.get(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._files.clear()
+            self._errors.clear()
+            self._invalid.clear()
+            self._snapshot = None
+            self._snapshot_stamp = None
+            self._snapshot_checked = float("-inf")
+
+
+# Loaded lazily, or up front by the application calling preload().
+_store = NyayaStore()
+
+
+def get_store() -> NyayaStore:
+    return _store
+
+
 # -------------------------
 # PUBLIC DATA ACCESS API
 # -------------------------
 
+def _lookup(span: str, country: str, filename: str, key: str) -> Any:
+    timer = _store.timer
+    if timer is None:
+        return _store.get(country, filename, key)
+    with timer(span):
+        return _store.get(country, filename, key)
+
+
 def get_domain(country: str, domain_id: str) -> Optional[Dict[str, Any]]:
-    data = _load_json(country, "domains.json")
-    if not data:
-        return None
-    return data.get(domain_id)
+    return _lookup("nyaya_loader.get_domain", country, "domains.json", domain_id)
 
 
 def get_routes(country: str, domain_id: str) -> Optional[List[Dict[str, Any]]]:
-    data = _load_json(country, "routes.json")
-    if not data:
-        return None
-    return data.get(domain_id)
+    return _lookup("nyaya_loader.get_routes", country, "routes.json", domain_id)
 
 
 def get_procedure(country: str, procedure_id: str) -> Optional[Dict[str, Any]]:
-    data = _load_json(country, "procedures.json")
-    if not data:
-        return None
-    return data.get(procedure_id)
+    return _lookup("nyaya_loader.get_procedure", country, "procedures.json", procedure_id)
 
 
 def get_timeline(country: str, route_id: str) -> Optional[List[Dict[str, Any]]]:
-    data = _load_json(country, "timelines.json")
-    if not data:
-        return None
-    return data.get(route_id)
+    return _lookup("nyaya_loader.get_timeline", country, "timelines.json", route_id)
 
 
 def get_evidence(country: str, route_id: str) -> Optional[Dict[str, Any]]:
-    data = _load_json(country, "evidence.json")
-    if not data:
-        return None
-    return data.get(route_id)
+    return _lookup("nyaya_loader.get_evidence", country, "evidence.json", route_id)
 
 
 def get_glossary(country: str, domain_id: str) -> Optional[Dict[str, Any]]:
-    data = _load_json(country, "glossary.json")
-    if not data:
-        return None
-    return data.get(domain_id)
+    return _lookup("nyaya_loader.get_glossary", country, "glossary.json", domain_id)
@@ -0,0 +1,295 @@
+"""
+Compact, memory-mappable snapshot of the Nyaya datasets.
+
+Layout (all integers little-endian):
+
+    header     magic, format version, directory offset/length
+    records    one compact JSON document per dataset key
+    indexes    per (country, file): JSON {key: [offset, length]}
+    directory  JSON {"dataset_version", "built_at",
+                     "files": {country: {filename: [offset, length]}}}
+
+Opening a snapshot reads only the header and the directory. A file's
+index is decoded the first time the file is touched and a record the
+first time its key is requested, so startup time and resident memory do
+not grow with the size of the catalogs.
+
+Build with:
+
+    python -m nyaya_snapshot [--data-dir DIR] [--output PATH]
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+MAGIC = b"NYAYASNP"
+FORMAT_VERSION = 1
+
+# magic, format version, reserved, directory offset, directory length
+HEADER = struct.Struct("<8sHHQQ")
+
+Span = Tuple[int, int]
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class SnapshotBuildError(SnapshotError):
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__("Invalid dataset:\n  " + "\n  ".join(problems))
+
+
+def _encode(value: Any, sort_keys: bool = False) -> bytes:
+    # Records keep their key order, so they encode to the same bytes (and
+    # ETags) as when they are served from the JSON files.
+    return json.dumps(
+        value, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys
+    ).encode("utf-8")
+
+
+# -------------------------
+# READER
+# -------------------------
+
+class SnapshotFile(Mapping[str, Any]):
+    """
+    Read-only mapping over one dataset file inside a snapshot. Records
+    are decoded on first access and then shared between callers.
+    """
+
+    def __init__(self, snapshot: "Snapshot", index_span: Span):
+        self._snapshot = snapshot
+        self._index_span = index_span
+        self._index: Optional[Dict[str, Span]] = None
+        self._decoded: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _keys(self) -> Dict[str, Span]:
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = json.loads(self._snapshot.read(self._index_span))
+        return self._index
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._decoded[key]
+        except KeyError:
+            pass
+        span = self._keys()[key]
+        value = json.loads(self._snapshot.read(span))
+        return self._decoded.setdefault(key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+
+class Snapshot:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < HEADER.size:
+            raise SnapshotError(f"{path}: truncated snapshot")
+        magic, version, _, dir_offset, dir_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path}: not a Nyaya snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(
+                f"{path}: snapshot format {version}, expected {FORMAT_VERSION}"
+            )
+        if dir_offset + dir_length > len(self._mmap):
+            raise SnapshotError(f"{path}: truncated snapshot")
+
+        directory = json.loads(self.read((dir_offset, dir_length)))
+        self.dataset_version: str = directory["dataset_version"]
+        self.built_at: str = directory["built_at"]
+        self._files: Dict[str, Dict[str, Span]] = directory["files"]
+        self._opened: Dict[Tuple[str, str], SnapshotFile] = {}
+        self._lock = threading.Lock()
+
+    def read(self, span: Span) -> bytes:
+        offset, length = span
+        return self._mmap[offset:offset + length]
+
+    def countries(self) -> List[str]:
+        return sorted(self._files)
+
+    def has(self, country: str, filename: str) -> bool:
+        return filename in self._files.get(country, {})
+
+    def file(self, country: str, filename: str) -> Optional[SnapshotFile]:
+        span = self._files.get(country, {}).get(filename)
+        if span is None:
+            return None
+        with self._lock:
+            opened = self._opened.get((country, filename))
+            if opened is None:
+                opened = self._opened[(country, filename)] = SnapshotFile(self, tuple(span))
+            return opened
+
+
+def open_snapshot(path: str) -> Snapshot:
+    return Snapshot(path)
+
+
+# -------------------------
+# BUILDER
+# -------------------------
+
+def _load_dataset(
+    data_dir: str,
+    filenames: Iterable[str],
+    validator: Optional[Callable[[str, Mapping[str, Any]], Dict[str, List[str]]]]
+) -> Tuple[Dict[str, Dict[str, Dict[str, Any]]], List[str]]:
+    datasets: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    problems: List[str] = []
+
+    if not os.path.isdir(data_dir):
+        return datasets, [f"{data_dir}: not a directory"]
+
+    for country in sorted(os.listdir(data_dir)):
+        country_dir = os.path.join(data_dir, country)
+        if not os.path.isdir(country_dir):
+            continue
+        files = datasets[country] = {}
+        for filename in filenames:
+            path = os.path.join(country_dir, filename)
+            # Missing and zero-byte placeholder files carry no data; the
+            # loader treats both as absent.
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, UnicodeDecodeError, json.JSONDecodeError) as exc:
+                problems.append(f"{country}/{filename}: {exc}")
+                continue
+            if not isinstance(data, dict):
+                problems.append(
+                    f"{country}/{filename}: top level must be an object, "
+                    f"got {type(data).__name__}"
+                )
+                continue
+            if validator is not None:
+                for key, errors in validator(filename, data).items():
+                    problems.extend(f"{country}/{filename}: {key}: {error}" for error in errors)
+            files[filename] = data
+
+    return datasets, problems
+
+
+def build_snapshot(
+    data_dir: str,
+    output: str,
+    filenames: Iterable[str],
+    validator: Optional[Callable[[str, Mapping[str, Any]], Dict[str, List[str]]]] = None
+) -> Dict[str, Any]:
+    """
+    Validate every country directory under data_dir, including each
+    dataset's entries against validator (e.g. app.schema.dataset_errors),
+    and compile it into a snapshot at output. The file is written next to output and renamed
+    into place, so running workers never see a partial snapshot.
+
+    Raises SnapshotBuildError listing every invalid file.
+    """
+    datasets, problems = _load_dataset(data_dir, filenames, validator)
+    if problems:
+        raise SnapshotBuildError(problems)
+
+    digest = hashlib.sha256()
+    directory: Dict[str, Dict[str, Span]] = {}
+    records = 0
+
+    out_dir = os.path.dirname(os.path.abspath(output))
+    fd, tmp_path = tempfile.mkstemp(prefix=".nyaya-snapshot-", dir=out_dir)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(b"\0" * HEADER.size)
+            offset = HEADER.size
+
+            for country, files in datasets.items():
+                for filename, data in files.items():
+                    index: Dict[str, Span] = {}
+                    for key in data:
+                        blob = _encode(data[key])
+                        index[key] = (offset, len(blob))
+                        out.write(blob)
+                        offset += len(blob)
+                        digest.update(f"{country}/{filename}/{key}\0".encode("utf-8"))
+                        digest.update(blob)
+                        records += 1
+
+                    blob = _encode(index)
+                    directory.setdefault(country, {})[filename] = (offset, len(blob))
+                    out.write(blob)
+                    offset += len(blob)
+
+            dataset_version = digest.hexdigest()[:16]
+            blob = _encode({
+                "dataset_version": dataset_version,
+                "built_at": datetime.now(timezone.utc).isoformat(),
+                "files": directory,
+            }, sort_keys=True)
+            out.write(blob)
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, offset, len(blob)))
+            size = offset + len(blob)
+
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, output)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    return {
+        "path": output,
+        "dataset_version": dataset_version,
+        "countries": sorted(datasets),
+        "records": records,
+        "bytes": size,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import nyaya_loader
+    from app.schema import dataset_errors
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data-dir", default=nyaya_loader.DATA_DIR)
+    parser.add_argument("--output", default=None, help="defaults to <data-dir>/" + nyaya_loader.SNAPSHOT_FILENAME)
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.join(args.data_dir, nyaya_loader.SNAPSHOT_FILENAME)
+    try:
+        summary = build_snapshot(
+            args.data_dir, output, nyaya_loader.DATASET_FILES, dataset_errors
+        )
+    except SnapshotBuildError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
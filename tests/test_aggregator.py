@@ -0,0 +1,136 @@
+import pytest
+
+from app.memory.aggregator import RewardAggregator
+
+
+class Session:
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class Backend:
+    """
+    Records applied batches. Batches holding a key in poison fail, as do
+    the next `failures` calls.
+    """
+
+    def __init__(self, failures=0, poison=()):
+        self.failures = failures
+        self.poison = set(poison)
+        self.attempts = []
+        self.applied = []
+
+    def apply(self, db, batch_id, batch):
+        self.attempts.append(batch_id)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database unavailable")
+        if self.poison & batch.keys():
+            raise RuntimeError("rejected")
+        if any(applied_id == batch_id for applied_id, _ in self.applied):
+            return False
+        self.applied.append((batch_id, dict(batch)))
+        return True
+
+
+def make_aggregator(backend, **kwargs):
+    # The background thread only flushes once max_staleness passes, so the
+    # tests drive every flush themselves.
+    kwargs.setdefault("max_staleness", 3600)
+    flushed = []
+    aggregator = RewardAggregator(Session, backend, on_flush=flushed.extend, **kwargs)
+    return aggregator, flushed
+
+
+def test_flush_writes_summed_votes():
+    backend = Backend()
+    aggregator, flushed = make_aggregator(backend)
+    aggregator.add("s", "a", 1.0)
+    aggregator.add("s", "a", 0.5)
+    aggregator.add("s", "b", -1.0)
+
+    assert aggregator.flush() == 2
+    assert backend.applied[0][1] == {("s", "a"): (1.5, 2), ("s", "b"): (-1.0, 1)}
+    assert sorted(flushed) == [("s", "a"), ("s", "b")]
+    assert aggregator.pending() == 0
+
+
+def test_failed_batch_is_retried_under_same_id_before_newer_votes():
+    backend = Backend(failures=1)
+    aggregator, _ = make_aggregator(backend)
+    aggregator.add("s", "a", 1.0)
+
+    with pytest.raises(RuntimeError):
+        aggregator.flush()
+    assert aggregator.pending() == 1
+
+    aggregator.add("s", "b", 1.0)
+    assert aggregator.flush() == 2
+
+    first_id = backend.attempts[0]
+    assert backend.attempts[1] == first_id
+    assert [batch_id for batch_id, _ in backend.applied][0] == first_id
+    assert backend.applied[0][1] == {("s", "a"): (1.0, 1)}
+    assert backend.applied[1][1] == {("s", "b"): (1.0, 1)}
+
+
+def test_batch_already_applied_is_not_counted_twice():
+    backend = Backend()
+    aggregator, flushed = make_aggregator(backend)
+    backend.applied.append(("dup", {("s", "a"): (1.0, 1)}))
+    aggregator._retry = ("dup", {("s", "a"): (1.0, 1)}, 1)
+
+    assert aggregator.flush() == 0
+    assert len(backend.applied) == 1
+    # The cache is still invalidated: the earlier attempt did land.
+    assert flushed == [("s", "a")]
+
+
+def test_poison_batch_is_dropped_after_max_attempts(caplog):
+    backend = Backend(poison=[("s", "bad")])
+    aggregator, _ = make_aggregator(backend, max_attempts=3)
+    aggregator.add("s", "bad", 1.0)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            aggregator.flush()
+    aggregator.add("s", "good", 1.0)
+
+    with caplog.at_level("ERROR", logger="app.memory.aggregator"):
+        assert aggregator.flush() == 1
+
+    assert len(backend.attempts) == 4
+    assert backend.applied[0][1] == {("s", "good"): (1.0, 1)}
+    assert aggregator._retry is None
+    assert aggregator.pending() == 0
+    assert '["s", "bad", 1.0, 1]' in caplog.text
+
+
+def test_backoff_grows_to_max_backoff():
+    aggregator, _ = make_aggregator(Backend(), max_staleness=0.5, max_backoff=3.0)
+    assert [aggregator._backoff(n) for n in (1, 2, 3, 4, 10)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+
+
+def test_stop_drops_failing_batches_instead_of_raising(caplog):
+    backend = Backend(poison=[("s", "bad")])
+    aggregator, _ = make_aggregator(backend, max_attempts=5)
+    aggregator.add("s", "bad", 1.0)
+    with pytest.raises(RuntimeError):
+        aggregator.flush()
+    aggregator.add("s", "good", 1.0)
+
+    with caplog.at_level("ERROR", logger="app.memory.aggregator"):
+        aggregator.stop()
+
+    # The batch still had attempts left, but there is no later flush to
+    # retry it; it is dropped and the newer votes are still written.
+    assert [batch for _, batch in backend.applied] == [{("s", "good"): (1.0, 1)}]
+    assert aggregator._retry is None
+    assert aggregator.pending() == 0
+    assert '["s", "bad", 1.0, 1]' in caplog.text
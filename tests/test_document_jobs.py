@@ -0,0 +1,120 @@
+import os
+import time
+
+import fitz
+import pytest
+
+from app.documents import jobs
+from app.documents.jobs import DocumentJobQueue, JobQueueFull
+
+
+def make_pdf(directory, name="filing.pdf", text="Notice served under Section 106 on 12/05/2021."):
+    path = os.path.join(directory, name)
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def wait_finished(queue, job, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while job.status not in jobs.FINISHED:
+        assert time.monotonic() < deadline, f"job still {job.status}"
+        time.sleep(0.01)
+    return queue.get(job.job_id)
+
+
+@pytest.fixture
+def queue():
+    queues = []
+
+    def make(**kwargs):
+        kwargs.setdefault("workers", 1)
+        q = DocumentJobQueue(**kwargs)
+        queues.append(q)
+        return q
+
+    yield make
+    for q in queues:
+        q.stop()
+
+
+def test_processes_job(queue, tmp_path):
+    q = queue()
+    q.start()
+    path = make_pdf(str(tmp_path))
+    job = wait_finished(q, q.submit(path, "IN_RENT_EVICTION"))
+
+    assert job.status == jobs.DONE
+    assert "Section 106" in job.result["preview"]
+    assert job.error is None
+    # The worker removes the file once the job is finished.
+    q.stop()
+    assert not os.path.exists(path)
+
+
+def test_rejects_jobs_past_max_queued(queue, tmp_path):
+    # Without workers nothing leaves the queue.
+    q = queue(max_queued=2)
+    paths = [make_pdf(str(tmp_path), f"{i}.pdf") for i in range(3)]
+    q.submit(paths[0])
+    q.submit(paths[1])
+
+    assert not q.has_capacity()
+    with pytest.raises(JobQueueFull):
+        q.submit(paths[2])
+    # A refused upload still belongs to the caller.
+    assert os.path.exists(paths[2])
+    assert q.queued == 2
+
+
+def test_times_out(queue, tmp_path):
+    q = queue(timeout=1e-9)
+    q.start()
+    job = wait_finished(q, q.submit(make_pdf(str(tmp_path))))
+
+    assert job.status == jobs.TIMEOUT
+    assert job.result is None
+    assert "exceeded" in job.error
+
+
+def test_forgets_finished_jobs_after_result_ttl(queue, tmp_path):
+    q = queue(result_ttl=0.05)
+    q.start()
+    job = q.submit(make_pdf(str(tmp_path)))
+    wait_finished(q, job)
+    assert q.get(job.job_id) is job
+
+    time.sleep(0.1)
+    assert q.get(job.job_id) is None
+
+
+def test_stop_cancels_waiting_jobs(queue, tmp_path):
+    q = queue()
+    path = make_pdf(str(tmp_path))
+    job = q.submit(path)
+    q.stop()
+
+    assert job.status == jobs.CANCELLED
+    assert not os.path.exists(path)
+    with pytest.raises(JobQueueFull):
+        q.submit(make_pdf(str(tmp_path), "late.pdf"))
+
+
+def test_finished_status_is_set_after_result(queue, tmp_path, monkeypatch):
+    # Record what a poller would see at the moment the status turns DONE.
+    seen = []
+
+    class Job(jobs.DocumentJob):
+        def __setattr__(self, name, value):
+            if name == "status" and value == jobs.DONE:
+                seen.append(self.result)
+            super().__setattr__(name, value)
+
+    monkeypatch.setattr(jobs, "DocumentJob", Job)
+    q = queue()
+    q.start()
+    wait_finished(q, q.submit(make_pdf(str(tmp_path))))
+
+    assert seen and seen[0] is not None
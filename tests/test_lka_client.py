@@ -0,0 +1,123 @@
+import asyncio
+
+import httpx
+import pytest
+
+import lka_stub
+from app.lka_client import LKAClient
+
+
+class StubTransport(httpx.AsyncBaseTransport):
+    """
+    Serves lka_stub in process, counting upstream calls. While gate is set
+    and not yet open, requests wait on it, so tests can hold calls in
+    flight.
+    """
+
+    def __init__(self):
+        self.inner = httpx.ASGITransport(app=lka_stub.app)
+        self.calls = 0
+        self.gate = None
+
+    async def handle_async_request(self, request):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        return await self.inner.handle_async_request(request)
+
+
+def make_client(**kwargs):
+    transport = StubTransport()
+    client = LKAClient(base_url="http://stub/lka", transport=transport, **kwargs)
+    return client, transport
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_fetches_from_stub():
+    async def scenario():
+        client, _ = make_client()
+        async with client:
+            procedure = await client.get_procedure("IN_EVICT_NOTICE")
+            routes = await client.get_routes_for_domain("IN_RENT_EVICTION")
+        return procedure, routes
+
+    procedure, routes = run(scenario())
+    assert procedure["procedure_id"] == "IN_EVICT_NOTICE"
+    assert routes and all("route_id" in route for route in routes)
+
+
+def test_concurrent_requests_are_coalesced():
+    async def scenario():
+        client, transport = make_client()
+        transport.gate = asyncio.Event()
+        async with client:
+            tasks = [asyncio.ensure_future(client.get_procedure("IN_EVICT_NOTICE")) for _ in range(10)]
+            await asyncio.sleep(0.01)
+            transport.gate.set()
+            results = await asyncio.gather(*tasks)
+        return results, transport.calls
+
+    results, calls = run(scenario())
+    assert calls == 1
+    assert all(result == results[0] for result in results)
+
+
+def test_results_are_cached_until_ttl_expires():
+    async def scenario():
+        client, transport = make_client(cache_ttl=0.05)
+        async with client:
+            await client.get_outcome_signal("IN_EVICT_NOTICE")
+            await client.get_outcome_signal("IN_EVICT_NOTICE")
+            cached_calls = transport.calls
+            await asyncio.sleep(0.1)
+            await client.get_outcome_signal("IN_EVICT_NOTICE")
+        return cached_calls, transport.calls
+
+    cached_calls, calls = run(scenario())
+    assert cached_calls == 1
+    assert calls == 2
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def scenario():
+        client, transport = make_client()
+        transport.gate = asyncio.Event()
+        async with client:
+            leader = asyncio.ensure_future(client.get_procedure("IN_EVICT_FILE"))
+            await asyncio.sleep(0.01)
+            follower = asyncio.ensure_future(client.get_procedure("IN_EVICT_FILE"))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            transport.gate.set()
+            result = await follower
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            # The completed call was cached for later callers.
+            again = await client.get_procedure("IN_EVICT_FILE")
+        return result, again, transport.calls
+
+    result, again, calls = run(scenario())
+    assert result["procedure_id"] == "IN_EVICT_FILE"
+    assert again == result
+    assert calls == 1
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    async def scenario():
+        client, transport = make_client()
+        transport.gate = asyncio.Event()
+        async with client:
+            tasks = [asyncio.ensure_future(client._get("/missing")) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            transport.gate.set()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            with pytest.raises(httpx.HTTPStatusError):
+                await client._get("/missing")
+        return results, transport.calls
+
+    results, calls = run(scenario())
+    assert all(isinstance(r, httpx.HTTPStatusError) for r in results)
+    assert calls == 2
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from app.memory.policies import PolicySelector, make_policy
+
+TOTALS = np.array([3.0, 2.5, 0.0, 1.0])
+COUNTS = np.array([4.0, 3.0, 0.0, 2.0])
+
+
+def selections(policy, rounds=200):
+    return [policy.select(TOTALS, COUNTS) for _ in range(rounds)]
+
+
+@pytest.mark.parametrize("name", ["epsilon_greedy", "thompson"])
+def test_seeded_policy_is_deterministic(name):
+    first = selections(make_policy(name, seed=7))
+    second = selections(make_policy(name, seed=7))
+    assert first == second
+    # The sequence actually explores, so the test would catch an RNG that
+    # ignored the seed.
+    assert len(set(first)) > 1
+
+
+def test_different_seeds_diverge():
+    assert selections(make_policy("thompson", seed=1)) != selections(make_policy("thompson", seed=2))
+
+
+def test_selector_reproduces_per_domain_sequences():
+    def run():
+        selector = PolicySelector(default="epsilon_greedy", by_domain={"b": "thompson"}, seed=11)
+        # Interleaving domains must not change either domain's sequence.
+        return [
+            (selector.for_domain(domain).select(TOTALS, COUNTS), domain)
+            for _ in range(100)
+            for domain in ("a", "b")
+        ]
+
+    assert run() == run()
+
+
+def test_selector_keeps_one_policy_per_domain():
+    selector = PolicySelector(default="thompson", seed=3)
+    assert selector.for_domain("a") is selector.for_domain("a")
+    assert selector.for_domain("a") is not selector.for_domain("b")
+
+
+def test_greedy_prefers_earliest_of_tied_routes():
+    policy = make_policy("greedy")
+    assert policy.select(np.array([1.0, 2.0, 2.0]), np.array([1.0, 1.0, 1.0])) == 1
+
+
+def test_ucb1_tries_unseen_routes_first():
+    assert make_policy("ucb1").select(TOTALS, COUNTS) == 2
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        make_policy("nope")
+    with pytest.raises(ValueError):
+        PolicySelector(by_domain={"a": "nope"})
@@ -0,0 +1,76 @@
+from app.memory.policies import RouteStats
+from app.memory.score_cache import RouteScoreCache
+
+
+def stats(total):
+    return RouteStats({"route": (total, 1.0)})
+
+
+def test_evicts_least_recently_used():
+    cache = RouteScoreCache(max_states=2)
+    cache.put("a", stats(1.0))
+    cache.put("b", stats(2.0))
+    # Reading a makes b the least recently used.
+    assert cache.get("a") is not None
+    cache.put("c", stats(3.0))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+
+
+def test_counts_hits_and_misses():
+    cache = RouteScoreCache()
+    cache.get("a")
+    cache.put("a", stats(1.0))
+    cache.get("a")
+    cache.get("a")
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_invalidate_drops_only_given_states():
+    cache = RouteScoreCache()
+    cache.put("a", stats(1.0))
+    cache.put("b", stats(2.0))
+    cache.invalidate(["a"])
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+
+
+def test_fill_started_before_invalidation_is_dropped():
+    cache = RouteScoreCache()
+    generation = cache.generation()
+    # Feedback is written while the reader is still loading scores.
+    cache.invalidate(["a"])
+    cache.put("a", stats(1.0), generation)
+    assert cache.get("a") is None
+
+    cache.put("a", stats(2.0), cache.generation())
+    assert cache.get("a").by_action["route"] == (2.0, 1.0)
+
+
+def test_clear_invalidates_pending_fills():
+    cache = RouteScoreCache()
+    generation = cache.generation()
+    cache.clear()
+    cache.put("a", stats(1.0), generation)
+    assert cache.get("a") is None
+
+
+def test_sync_clears_when_shared_version_moves():
+    cache = RouteScoreCache(sync_interval=3600)
+    assert cache.sync_due()
+    assert not cache.sync_due()
+
+    cache.sync(1)
+    cache.put("a", stats(1.0))
+    cache.sync(1)
+    assert cache.get("a") is not None
+
+    generation = cache.generation()
+    cache.sync(2)
+    assert cache.get("a") is None
+    assert cache.generation() != generation
+    assert cache.syncs == 2